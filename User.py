@@ -6,21 +6,39 @@ import plotly.graph_objects as go
 import seaborn as sns
 import streamlit as st
 from toplogger import TopLogger
-from toplogger.analysis import get_gym_climbs, get_user_master_tables
-from toplogger.utils import NUM2FRENCHGRADE
+from toplogger.analysis import (
+    SessionIndex,
+    load_gym_climbs,
+    load_user_master_tables,
+    weighted_mode,
+)
+from toplogger.grades import to_grade_label
+from toplogger.service import cache_loader, get_client
 
 TL = TopLogger()
+SERVICE = get_client()
+cache_data = cache_loader(st.cache_data)
 
 
-@st.cache_data
-def cached(user_id):
+@cache_data
+def cached(user_id, refresh=False):
     global TL
-    user = TL.user(user_id).execute(cached=False)
-    return *get_user_master_tables(user_id), user
+    user = TL.user(user_id).execute(cached=not refresh)
+    if SERVICE is not None:
+        return *SERVICE.user_master_tables(user_id, refresh=refresh), user
+    return *load_user_master_tables(user_id, refresh=refresh), user
+
+# Kept across reruns and refreshes, updated with the ascends of each run.
+@st.cache_resource(max_entries=100)
+def session_index(user_id):
+    return SessionIndex()
 
-@st.cache_data
+
+@cache_data
 def get_cached_gym_climbs(gym_id):
-    return get_gym_climbs(gym_id, cached=False)
+    if SERVICE is not None:
+        return SERVICE.gym_climbs(gym_id)
+    return load_gym_climbs(gym_id)
 
 RE_UID = re.compile("^https://app.toplogger.nu/.*uid=(\d+).*|^(\d+)$")
 
@@ -45,7 +63,9 @@ if user_id_input:
 else:
     user_id = None
 if user_id:
-    st.button("Force refresh", type="primary", on_click=lambda: cached.clear())
+    refresh = st.button("Force refresh", type="primary")
+    if refresh:
+        cached.clear()
     with st.spinner(text="In progress"):
         (
             df_ascends,
@@ -54,7 +74,7 @@ if user_id:
             df_community_opinions,
             df_toppers,
             user,
-        ) = cached(user_id)
+        ) = cached(user_id, refresh)
 
         st.markdown(
             f"""
@@ -66,13 +86,26 @@ if user_id:
 
         st.title("All-time stats")
 
-        df_major_vote = df_community_grades.assign(
-            major_vote_grade=lambda x: x.community_grade.apply(
-                lambda y: sorted(y, key=lambda z: z["count"])[-1]["grade"]
-            ),
-            grade_string=lambda x: x.major_vote_grade.apply(NUM2FRENCHGRADE.get),
-            grade_type="community",
-        ).sort_values(by="major_vote_grade")
+        df_major_vote = (
+            df_ascends[["climb_gym_id", "climb_id"]]
+            .merge(
+                weighted_mode(
+                    df_community_grades,
+                    by=["gym_id", "climb_id"],
+                    value="grade",
+                    weight="count",
+                )
+                .rename("major_vote_grade")
+                .reset_index(),
+                left_on=["climb_gym_id", "climb_id"],
+                right_on=["gym_id", "climb_id"],
+            )
+            .assign(
+                grade_string=lambda x: to_grade_label(x.major_vote_grade),
+                grade_type="community",
+            )
+            .sort_values(by="grade_string")
+        )
 
         df_ascends = df_ascends.assign(grade_type="setter")
         fig = go.Figure()
@@ -97,21 +130,24 @@ if user_id:
 
         st.title("Stats by session")
 
-        session_dates = sorted(
-            (df_ascends.assign(date=lambda x: x.date_logged.dt.date).date.unique()),
-            reverse=True,
-        )
+        sessions = session_index(user_id)
+        sessions.update(df_ascends, full=True)
         selected_date = st.selectbox(
             "Select session date",
-            session_dates,
+            sessions.dates[::-1],
             format_func=lambda x: x.strftime("%a %d/%m/%Y"),
         )
 
-        df_date = df_ascends[df_ascends.date_logged.dt.date == selected_date]
+        df_date = sessions.session(selected_date)
+        grade_counts = sessions.session_grade_counts(selected_date)
 
-        fig = px.histogram(
-            df_date.sort_values(by="climb_grade"),
+        fig = px.bar(
+            grade_counts[grade_counts > 0]
+            .rename("tops")
+            .rename_axis("grade_string")
+            .reset_index(),
             x="grade_string",
+            y="tops",
             title=f"Grades topped at {selected_date}",
             labels={
                 "grade_string": "Grade",
@@ -142,7 +178,7 @@ if user_id:
                 continue
             df_climbs = get_cached_gym_climbs(gym_id).merge(
                 df_ascends[["climb_id", "date_logged"]],
-                left_on="id_x",
+                left_on="id",
                 right_on="climb_id",
                 how="left",
             )
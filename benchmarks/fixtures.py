@@ -0,0 +1,203 @@
+"""Stand-in TopLogger API server replaying recorded-shape responses."""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+GYMS = {206: "Hangár Brno", 207: "Hangár Ostrava", 208: "Boulder Bar"}
+GRADES = ["4.0", "4.5", "5.0", "5.33", "5.67", "6.0", "6.17", "6.33", "6.5", "6.67"]
+GRADES += ["7.0", "7.17", "7.33", "7.5"]
+N_HOLDS = 12
+N_SETTERS = 15
+
+
+class Fixtures:
+    """Deterministic API responses for gyms and synthetic users.
+
+    A user's id is their number of ascends, e.g. user 1000 has 1000 ascends.
+    """
+
+    def __init__(self, climbs_per_gym=600, seed=0):
+        rng = random.Random(seed)
+        self.gyms = [{"id": gym_id, "name": name} for gym_id, name in GYMS.items()]
+        self.holds = [
+            {"id": hold_id, "brand": f"Color {hold_id}", "color": f"#{hold_id:06x}"}
+            for hold_id in range(1, N_HOLDS + 1)
+        ]
+        self.setters = [
+            {"id": setter_id, "name": f"Setter {setter_id}"}
+            for setter_id in range(1, N_SETTERS + 1)
+        ]
+        self.climbs = {
+            gym_id: [
+                {
+                    "id": gym_id * 100_000 + i,
+                    "gym_id": gym_id,
+                    "hold_id": rng.randint(1, N_HOLDS),
+                    "setter_id": rng.choice([None, *range(1, N_SETTERS + 1)]),
+                    "grade": rng.choice(GRADES),
+                    "lived": rng.random() < 0.9,
+                    "live": rng.random() < 0.5,
+                    "number": f"#{i}" if i % 7 else None,
+                    "remarks": None,
+                    "average_opinion": round(rng.uniform(2.5, 5), 2),
+                    "date_live_start": "2023-01-01T10:00:00.000+01:00",
+                }
+                for i in range(climbs_per_gym)
+            ]
+            for gym_id in GYMS
+        }
+        self.seed = seed
+
+    def gym(self, gym_id, includes):
+        gym = next((gym for gym in self.gyms if gym["id"] == gym_id), None)
+        if gym is None:
+            return None
+        return {
+            **gym,
+            **({"holds": self.holds} if "holds" in includes else {}),
+            **({"setters": self.setters} if "setters" in includes else {}),
+        }
+
+    def groups(self, gym_id):
+        climbs = self.climbs.get(gym_id)
+        if climbs is None:
+            return None
+        return [
+            {
+                "id": gym_id * 10 + n,
+                "name": f"Hangar Challenge {n}",
+                "gym_id": gym_id,
+                "order": n,
+                "live": True,
+                "lived": True,
+                "climbs_type": "boulder",
+                "score_system": "tops",
+                "approve_participation": False,
+                "split_gender": False,
+                "split_age": False,
+                "climb_groups": [
+                    {"climb_id": climb["id"], "order": i}
+                    for i, climb in enumerate(climbs[n * 40 : (n + 1) * 40])
+                ],
+            }
+            for n in range(3)
+        ]
+
+    def climb_stats(self, climb_id):
+        rng = random.Random(climb_id)
+        return {
+            "community_grades": [
+                {"grade": grade, "count": rng.randint(0, 8)}
+                for grade in rng.sample(GRADES, 3)
+            ],
+            "community_opinions": [
+                {"stars": stars, "votes": rng.randint(0, 6)} for stars in range(1, 6)
+            ],
+            "toppers": [
+                {"user_id": rng.randint(1, 5000), "date": "2024-01-01"}
+                for _ in range(rng.randint(0, 30))
+            ],
+        }
+
+    def ascends(self, user_id, since=None):
+        rng = random.Random(self.seed * 1_000_003 + user_id)
+        climbs = [climb for gym_climbs in self.climbs.values() for climb in gym_climbs]
+        ascends = []
+        for i in range(user_id):
+            climb = rng.choice(climbs)
+            day = 1 + i * 700 // max(user_id, 1)
+            ascends.append(
+                {
+                    "id": user_id * 100_000 + i,
+                    "user_id": user_id,
+                    "climb_id": climb["id"],
+                    "topped": rng.random() < 0.9,
+                    "checks": 1,
+                    "date_logged": time.strftime(
+                        "%Y-%m-%dT%H:%M:%S.000+01:00",
+                        time.gmtime(1_640_995_200 + day * 86_400),
+                    ),
+                    "climb": climb,
+                }
+            )
+        if since:
+            ascends = [a for a in ascends if a["date_logged"] >= since]
+        return ascends
+
+    def respond(self, path, json_params):
+        """Response body for request path, None if unknown (e.g. a gym id)."""
+        includes = json_params.get("includes", [])
+        filters = json_params.get("filters", {})
+        path = re.sub(r"^/v1", "", path)
+        if path == "/gyms":
+            return self.gyms
+        if match := re.fullmatch(r"/gyms/(\d+)", path):
+            return self.gym(int(match[1]), includes)
+        if match := re.fullmatch(r"/gyms/(\d+)/climbs", path):
+            return self.climbs.get(int(match[1]))
+        if match := re.fullmatch(r"/gyms/(\d+)/climbs/(\d+)/stats", path):
+            if int(match[1]) not in self.climbs:
+                return None
+            return self.climb_stats(int(match[2]))
+        if path == "/groups" and "gym_id" in filters:
+            return self.groups(int(filters["gym_id"]))
+        if path == "/ascends" and "uid" in filters.get("user", {}):
+            since = filters.get("date_logged", {}).get("gte")
+            return self.ascends(int(filters["user"]["uid"]), since)
+        if match := re.fullmatch(r"/users/(\d+)", path):
+            return {"id": int(match[1]), "first_name": "Bench", "last_name": "User"}
+        return None
+
+
+class FixtureServer:
+    """Local HTTP server serving Fixtures, with optional latency injection."""
+
+    def __init__(self, fixtures, latency=0.0):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                url = urlparse(self.path)
+                json_params = json.loads(
+                    parse_qs(url.query).get("json_params", ["{}"])[0]
+                )
+                body = server.fixtures.respond(url.path, json_params)
+                data = json.dumps(body).encode()
+                self.send_response(404 if body is None else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,83 @@
+"""Import-time benchmark of the toplogger package.
+
+Imports each module in a fresh interpreter with ``python -X importtime`` and
+reports the median cumulative import time, plus which heavy dependencies the
+import pulled in.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --modules toplogger toplogger.warmer
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+MODULES = [
+    "toplogger",
+    "toplogger.toplogger",
+    "toplogger.warmer",
+    "toplogger.analysis",
+]
+HEAVY = ["requests", "requests_cache", "pandas", "pyarrow"]
+
+
+def import_time(module):
+    """Import module in a fresh interpreter.
+
+    Returns cumulative import time in milliseconds and the heavy
+    dependencies loaded by the import.
+    """
+    code = f"import sys, {module}; print(*[m for m in {HEAVY!r} if m in sys.modules])"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(SRC), *sys.path[1:]])}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        _, _, fields = line.partition("import time:")
+        parts = [part.strip() for part in fields.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative = int(parts[1])
+    return cumulative / 1000, proc.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'module':<24} {'median ms':>10} {'min ms':>8}  loaded")
+    for module in args.modules:
+        runs = [import_time(module) for _ in range(args.repeat)]
+        times = [ms for ms, _ in runs]
+        result = {
+            "module": module,
+            "median_ms": statistics.median(times),
+            "min_ms": min(times),
+            "loaded": runs[-1][1],
+        }
+        results.append(result)
+        print(
+            f"{module:<24} {result['median_ms']:>10.1f} {result['min_ms']:>8.1f}  "
+            f"{' '.join(result['loaded']) or '-'}"
+        )
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Offline benchmarks of the toplogger analysis functions.
+
+Runs against a local stand-in API server (see fixtures.py), so results do
+not depend on the real API or network. For every scenario reports wall
+time, number of requests that reached the server and peak Python memory,
+both on a cold cache and on a warm one.
+
+With ``--baseline`` (the ``--json`` output of an earlier run) it is a
+regression gate: it exits with status 1 when a scenario makes more requests
+than the baseline, or takes more wall time or memory beyond the tolerance.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --users 100 1000 --latency 0.05 --max-workers 1 8
+    TOPLOGGER_RATE_LIMIT=50 python benchmarks/run.py --users 100 --rate-limited
+    python benchmarks/run.py --json baseline.json
+    python benchmarks/run.py --baseline baseline.json --tolerance 0.5
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fixtures import Fixtures, FixtureServer  # noqa: E402
+
+# Wall time differences below this are noise, whatever the tolerance.
+WALL_SLACK_S = 0.05
+
+
+def reset_state():
+    """Drop the shared session and memoized data, start in a fresh directory."""
+    import toplogger.toplogger
+    from toplogger.aggregates import clear_gym_aggregates
+    from toplogger.analysis import clear_gym_circuits, clear_gym_climb_stats
+    from toplogger.utils import clear_gym_metadata
+
+    if toplogger.toplogger._session is not None:
+        toplogger.toplogger._session.close()
+    toplogger.toplogger._session = None
+    clear_gym_metadata()
+    clear_gym_circuits()
+    clear_gym_climb_stats()
+    clear_gym_aggregates()
+    os.chdir(tempfile.mkdtemp(prefix="toplogger-bench-"))
+
+
+def measure(server, fn):
+    requests_before = server.requests
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_s": round(wall, 4),
+        "requests": server.requests - requests_before,
+        "peak_mib": round(peak / 2**20, 2),
+    }
+
+
+def scenarios(args):
+    from toplogger.aggregates import get_gym_aggregates
+    from toplogger.analysis import get_gym_climbs, get_user_master_tables
+    from toplogger.utils import find_gyms_by_name
+
+    for max_workers in args.max_workers:
+        for n_ascends in args.users:
+            yield (
+                f"get_user_master_tables[{n_ascends} ascends, {max_workers} workers]",
+                lambda n=n_ascends, w=max_workers: get_user_master_tables(
+                    n, max_workers=w
+                ),
+            )
+    yield (f"get_gym_climbs[{args.climbs} climbs]", lambda: get_gym_climbs(206))
+    yield (f"get_gym_aggregates[{args.climbs} climbs]", lambda: get_gym_aggregates(206))
+    yield ("find_gyms_by_name", lambda: find_gyms_by_name("hang"))
+
+
+def regressions(results, baseline, tolerance):
+    """Describe results worse than their baseline entry, if there is one.
+
+    Request counts are deterministic and may not grow at all; wall time and
+    peak memory may grow by the tolerance fraction.
+    """
+    baseline = {(b["scenario"], b["cache"]): b for b in baseline}
+    found = []
+    for result in results:
+        base = baseline.get((result["scenario"], result["cache"]))
+        if base is None:
+            continue
+        name = f"{result['scenario']} ({result['cache']})"
+        if result["requests"] > base["requests"]:
+            found.append(f"{name}: {result['requests']} requests > {base['requests']}")
+        if result["wall_s"] > base["wall_s"] * (1 + tolerance) + WALL_SLACK_S:
+            found.append(f"{name}: {result['wall_s']} s > {base['wall_s']} s")
+        if result["peak_mib"] > base["peak_mib"] * (1 + tolerance):
+            found.append(f"{name}: {result['peak_mib']} MiB > {base['peak_mib']} MiB")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--climbs", type=int, default=600, help="climbs per gym")
+    parser.add_argument("--max-workers", type=int, nargs="+", default=[8])
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added per request"
+    )
+    parser.add_argument(
+        "--rate-limited",
+        action="store_true",
+        help="keep the client rate limit (TOPLOGGER_RATE_LIMIT, _BURST) on",
+    )
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--baseline", help="fail on regressions against this file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed relative wall time and memory growth over the baseline",
+    )
+    args = parser.parse_args()
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+
+    fixtures = Fixtures(climbs_per_gym=args.climbs)
+    with FixtureServer(fixtures, latency=args.latency) as server:
+        os.environ["TOPLOGGER_API_URL"] = server.url
+        from toplogger.ratelimit import RATE_LIMITER
+
+        if not args.rate_limited:
+            # Benchmark the client, not the production rate limit.
+            RATE_LIMITER.rate = RATE_LIMITER.capacity = 1e9
+
+        results = []
+        print(f"{'scenario':<60} {'cache':<5} {'wall s':>8} {'reqs':>6} {'MiB':>8}")
+        for name, fn in scenarios(args):
+            reset_state()
+            for cache in ("cold", "warm"):
+                result = {"scenario": name, "cache": cache, **measure(server, fn)}
+                results.append(result)
+                print(
+                    f"{name:<60} {cache:<5} {result['wall_s']:>8.3f} "
+                    f"{result['requests']:>6} {result['peak_mib']:>8.2f}"
+                )
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if baseline is not None:
+        found = regressions(results, baseline, args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        if found:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,12 @@
 import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
 import plotly.express as px
 import seaborn as sns
 import streamlit as st
-from toplogger import TopLogger
-from toplogger.utils import (
-    NUM2FRENCHGRADE,
-    get_gym_holds_dict,
-    get_gym_setters_dict,
-    json_normalize,
-)
+from toplogger.aggregates import get_gym_aggregates
+from toplogger.service import cache_loader, get_client
 
-tl = TopLogger()
+SERVICE = get_client()
+cache_data = cache_loader(st.cache_data)
 
 gyms = {
     206: "Hangár Brno",
@@ -22,36 +16,27 @@ gyms = {
 gym_id = st.selectbox("Select gym", list(gyms.keys()), format_func=lambda x: gyms[x])
 
 
-@st.cache_data
-def data(gym_id):
-    climbs = tl.climbs(gym_id).execute()
-    gym_holds = get_gym_holds_dict(gym_id)
-    gym_setters = get_gym_setters_dict(gym_id)
+@cache_data
+def aggregates(gym_id, refresh=False):
+    if SERVICE is not None:
+        return SERVICE.gym_aggregates(gym_id, refresh=refresh)
+    return get_gym_aggregates(gym_id, refresh=refresh)
+
 
-    return (
-        pd.DataFrame(climbs)
-        .query("lived == True")
-        .astype({"setter_id": "Int64"})
-        .assign(
-            grade_str=lambda x: x["grade"].map(NUM2FRENCHGRADE.get).astype("string"),
-            color=lambda x: x["hold_id"].map(lambda y: gym_holds[y]["brand"]),
-            hexcolor=lambda x: x["hold_id"].map(lambda y: gym_holds[y]["color"]),
-            setter=lambda x: x["setter_id"].map(
-                lambda y: gym_setters.get(y, {"name": ""})["name"], na_action="ignore"
-            ),
-        )
-        .astype({"grade": float})
-    )
+def force_refresh():
+    aggregates(gym_id, refresh=True)
+    aggregates.clear()
 
 
-df_climbs = data(gym_id)
+frames = aggregates(gym_id)
 
-st.button("Force refresh", type="primary", on_click=lambda: data.clear())
+st.button("Force refresh", type="primary", on_click=force_refresh)
 
 # Alltime grade
-fig = px.histogram(
-    df_climbs.sort_values(by="grade"),
+fig = px.bar(
+    frames["grade_counts"],
     x="grade_str",
+    y="routes",
     title=f"All-time grades distribution at {gyms[gym_id]}",
     labels={
         "grade_str": "Grade",
@@ -61,9 +46,10 @@ fig.update_layout(yaxis_title="Number of routes")
 st.plotly_chart(fig)
 
 # Setters
-fig = px.histogram(
-    df_climbs,
+fig = px.bar(
+    frames["setter_counts"],
     x="setter",
+    y="routes",
     title=f"All-time setters distribution at {gyms[gym_id]}",
     labels={
         "setter": "Setter",
@@ -75,38 +61,7 @@ st.plotly_chart(fig)
 
 # Most fun routes
 
-
-@st.cache_data
-def opinions(df):
-    community_grades = []
-    community_opinions = []
-    toppers = []
-    for ascend in df.itertuples():
-        cs = tl.climb_stats(gym_id, ascend.id).execute()
-        community_grades.append(cs["community_grades"])
-        community_opinions.append(cs["community_opinions"])
-        toppers.append(cs["toppers"])
-    return df.assign(
-        community_grade=community_grades,
-        community_opinion=community_opinions,
-    )
-
-
-df_climbs = opinions(df_climbs)
-
-df_opinions = (
-    df_climbs.explode("community_opinion")
-    .reset_index()
-    .pipe(json_normalize, col="community_opinion")
-    .query("community_opinion_votes > 0")
-    .reset_index()
-    .assign(stars=lambda x: x.community_opinion_stars * x.community_opinion_votes)
-    .groupby("setter")
-    .agg({"community_opinion_votes": "sum", "stars": "sum"})
-    .assign(average_stars=lambda x: x.stars / x.community_opinion_votes)
-    .sort_values("average_stars")
-    .reset_index()
-)
+df_opinions = frames["setter_opinions"]
 fig = px.histogram(
     df_opinions,
     y="average_stars",
@@ -120,29 +75,7 @@ fig.update_layout(yaxis_range=[3.5, 5])
 st.plotly_chart(fig)
 
 
-df_setter_grade_diff = (
-    df_climbs.reset_index()
-    .assign(
-        community_grade=lambda x: x.community_grade.apply(
-            lambda grades: [
-                float(g["grade"]) for g in grades for _ in range(g["count"])
-            ]
-        )
-    )
-    .assign(
-        community_grade=lambda x: x.apply(
-            lambda row: np.mean(row["community_grade"])
-            if len(row["community_grade"]) > 0
-            else row["grade"],
-            axis=1,
-        ),
-        grade_diff=lambda x: x.grade - x.community_grade,
-    )
-    .groupby("setter")
-    .grade_diff.describe()
-    .sort_values(by="count", ascending=False)
-    .iloc[:, 1:]
-)
+df_setter_grade_diff = frames["setter_grade_diff"].set_index("setter").iloc[:, 1:]
 
 plt.title("Positive = setter grades harder than community")
 fig = sns.heatmap(
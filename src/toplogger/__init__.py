@@ -1,3 +1,20 @@
 """TopLogger Python API Wrapper"""
 __version__ = "0.1"
-from .toplogger import TopLogger
+from .exceptions import TopLoggerError, TopLoggerHTTPError, TopLoggerRateLimitError
+
+# The client pulls in requests; it is imported on first attribute access.
+_LAZY = {"AsyncTopLogger": ".toplogger", "TopLogger": ".toplogger"}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY])
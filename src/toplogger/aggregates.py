@@ -0,0 +1,131 @@
+import hashlib
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from toplogger.analysis import (
+    get_gym_climb_stats,
+    get_gym_climbs,
+    weighted_mean,
+)
+from toplogger.instrumentation import span
+from toplogger.snapshot import load_snapshot, save_snapshot
+from toplogger.utils import is_fresh
+
+GYM_AGGREGATES_MAX_AGE = timedelta(hours=1)
+
+_gym_aggregates = {}
+
+
+def data_version(*frames):
+    """Short content hash of frames, changes whenever their data does."""
+    digest = hashlib.sha1()
+    for df in frames:
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def build_gym_aggregates(df_climbs, df_community_grades, df_community_opinions):
+    """Aggregate live climbs of a gym (one row each) and their stats.
+
+    Returns small frames: routes per grade, routes per setter, average
+    opinion per setter and the setter vs community grade difference per
+    setter (describe() columns).
+    """
+    grade_counts = (
+        df_climbs.grade_str.value_counts(sort=False)
+        .sort_index()
+        .rename("routes")
+        .loc[lambda x: x > 0]
+        .rename_axis("grade_str")
+        .reset_index()
+    )
+    setter_counts = (
+        df_climbs.setter.value_counts()
+        .rename("routes")
+        .rename_axis("setter")
+        .reset_index()
+    )
+    setter_opinions = (
+        df_community_opinions.merge(
+            df_climbs[["id", "setter"]], left_on="climb_id", right_on="id"
+        )
+        .pipe(weighted_mean, by="setter", value="stars", weight="votes")
+        .rename("average_stars")
+        .sort_values()
+        .reset_index()
+    )
+    setter_grade_diff = (
+        df_climbs.merge(
+            weighted_mean(
+                df_community_grades, by="climb_id", value="grade", weight="count"
+            ).rename("community_grade"),
+            how="left",
+            left_on="id",
+            right_index=True,
+        )
+        .assign(
+            community_grade=lambda x: x.community_grade.fillna(x.grade),
+            grade_diff=lambda x: x.grade - x.community_grade,
+        )
+        .groupby("setter")
+        .grade_diff.describe()
+        .sort_values(by="count", ascending=False)
+        .reset_index()
+    )
+    return {
+        "grade_counts": grade_counts,
+        "setter_counts": setter_counts,
+        "setter_opinions": setter_opinions,
+        "setter_grade_diff": setter_grade_diff,
+    }
+
+
+def get_gym_aggregates(gym_id, max_age=GYM_AGGREGATES_MAX_AGE, refresh=False):
+    """Get the Gyms page aggregates of gym, keyed by gym and data version.
+
+    Served from the process memo or the latest snapshot while younger than
+    max_age. Otherwise the climbs and gym climb stats are reloaded, from the
+    response cache or, with ``refresh=True``, refetched; aggregates are only
+    recomputed and stored when the version of that data changed. The version
+    is in ``meta``.
+    """
+    gym_id = int(gym_id)
+    memo = _gym_aggregates.get(gym_id)
+    if not refresh and is_fresh(_gym_aggregates, gym_id, max_age):
+        return memo[1]
+    frames = None if refresh else load_snapshot("gym_aggregates", gym_id, max_age)
+    if frames is None:
+        with span("gym_aggregates.load"):
+            # get_gym_climbs has a row per circuit of a climb, aggregates
+            # count every climb once.
+            df_climbs = get_gym_climbs(
+                gym_id, cached=not refresh, refresh_circuits=refresh
+            ).drop_duplicates("id")
+            _, df_community_grades, df_community_opinions, _ = get_gym_climb_stats(
+                gym_id, max_age=max_age, refresh=refresh, df_climbs=df_climbs
+            )
+        version = data_version(
+            df_climbs[["id", "grade", "setter"]],
+            df_community_grades,
+            df_community_opinions,
+        )
+        if memo is not None and memo[1]["meta"].version.iloc[0] == version:
+            frames = memo[1]
+        else:
+            with span("gym_aggregates.build"):
+                frames = build_gym_aggregates(
+                    df_climbs, df_community_grades, df_community_opinions
+                )
+            frames["meta"] = pd.DataFrame(
+                {"gym_id": [gym_id], "version": [version], "built_at": [time.time()]}
+            )
+        save_snapshot("gym_aggregates", gym_id, frames)
+    _gym_aggregates[gym_id] = (time.time(), frames)
+    return frames
+
+
+def clear_gym_aggregates():
+    """Forget memoized gym aggregates; snapshots are kept."""
+    _gym_aggregates.clear()
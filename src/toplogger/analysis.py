@@ -1,27 +1,225 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
 import pandas as pd
 
 from toplogger import TopLogger
+from toplogger.grades import to_grade_label
+from toplogger.instrumentation import span
+from toplogger.snapshot import load_snapshot, save_snapshot
+from toplogger.sync import sync_user_ascends
+from toplogger.toplogger import DEFAULT_MAX_WORKERS
 from toplogger.utils import (
-    NUM2FRENCHGRADE,
-    get_gym_holds_dict,
-    get_gym_setters_dict,
-    list2dict,
+    GYM_METADATA_MAX_AGE,
+    get_gym_groups,
+    get_gym_metadata,
+    is_fresh,
 )
 
+COMMUNITY_GRADE_DTYPES = {
+    "gym_id": "int32",
+    "climb_id": "int32",
+    "grade": "float32",
+    "count": "int32",
+}
+COMMUNITY_OPINION_DTYPES = {
+    "gym_id": "int32",
+    "climb_id": "int32",
+    "stars": "float32",
+    "votes": "int32",
+}
+
 
 def json_normalize(df, col):
     return (
         df.reset_index(drop=True)
-        .assign(**pd.json_normalize(df[col]).add_prefix(f"{col}_"))
+        .assign(**pd.json_normalize(df[col].tolist()).add_prefix(f"{col}_"))
         .drop(columns=[col])
     )
 
 
-def get_user_master_tables(user_id):
+def records_frame(records):
+    """DataFrame of API records, dicts or typed records of toplogger.models."""
+    if records and hasattr(records[0], "__struct_fields__"):
+        from toplogger.models import to_frame
+
+        return to_frame(records)
+    return pd.DataFrame(records)
+
+
+def frame_from_chunks(chunks, query=None):
+    """Build a DataFrame from chunks of records, filtering each chunk first."""
+    frames = [
+        records_frame(chunk) if query is None else records_frame(chunk).query(query)
+        for chunk in chunks
+    ]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _holds_frame(gym_ids):
+    return pd.DataFrame(
+        [
+            (int(gym_id), hold_id, hold["brand"], hold["color"])
+            for gym_id in gym_ids
+            for hold_id, hold in get_gym_metadata(gym_id)["holds"].items()
+        ],
+        columns=["gym_id", "hold_id", "color", "hexcolor"],
+    )
+
+
+def _setters_frame(gym_ids):
+    return pd.DataFrame(
+        [
+            (int(gym_id), setter_id, setter["name"])
+            for gym_id in gym_ids
+            for setter_id, setter in get_gym_metadata(gym_id)["setters"].items()
+        ],
+        columns=["gym_id", "setter_id", "setter"],
+    ).astype({"setter_id": "Int64"})
+
+
+def enrich_holds_setters(
+    df, gym_col="gym_id", hold_col="hold_id", setter_col="setter_id"
+):
+    """Add hold color, hexcolor and setter name columns to climbs.
+
+    Joins per-gym lookup frames on (gym, hold) and (gym, setter). Unknown
+    setters (e.g. -1) get an empty setter name, climbs without one (<NA>)
+    keep a missing name, so they are left out of per-setter aggregates.
+    """
+    gym_ids = df[gym_col].unique()
+    keys = df[[gym_col, hold_col, setter_col]].astype(
+        {gym_col: int, hold_col: int, setter_col: "Int64"}
+    )
+    lookup = (
+        keys.merge(
+            _holds_frame(gym_ids),
+            how="left",
+            left_on=[gym_col, hold_col],
+            right_on=["gym_id", "hold_id"],
+            suffixes=("", "_hold"),
+        )
+        .merge(
+            _setters_frame(gym_ids),
+            how="left",
+            left_on=[gym_col, setter_col],
+            right_on=["gym_id", "setter_id"],
+            suffixes=("", "_setter"),
+        )
+        .set_axis(df.index)
+    )
+    return df.assign(
+        color=lookup["color"],
+        hexcolor=lookup["hexcolor"],
+        setter=lookup["setter"].where(
+            keys[setter_col].isna().to_numpy(), lookup["setter"].fillna("")
+        ),
+    )
+
+
+def get_climb_stats(df_climbs, max_workers=DEFAULT_MAX_WORKERS, cached=True):
+    """Fetch stats of climbs given by gym_id and climb_id columns.
+
+    Each unique climb is fetched once, from the response cache if cached.
+    Returns long community grades (gym_id, climb_id, grade, count),
+    community opinions (gym_id, climb_id, stars, votes) and toppers; rows
+    without votes are dropped.
+    """
     tl = TopLogger()
-    ascends = tl.user_ascends(user_id).includes("climb").execute()
-    df_ascends = (
+    keys = df_climbs[["gym_id", "climb_id"]].drop_duplicates()
+    climbs = list(zip(keys.gym_id.astype(int), keys.climb_id.astype(int)))
+    climb_stats = tl.execute_all(
+        (tl.climb_stats(gym_id, climb_id) for gym_id, climb_id in climbs),
+        cached=cached,
+        max_workers=max_workers,
+    )
+    df_community_grades = pd.DataFrame(
+        [
+            (gym_id, climb_id, float(grade["grade"]), grade["count"])
+            for (gym_id, climb_id), cs in zip(climbs, climb_stats)
+            for grade in cs["community_grades"]
+            if grade["count"] > 0
+        ],
+        columns=["gym_id", "climb_id", "grade", "count"],
+    ).astype(COMMUNITY_GRADE_DTYPES)
+    df_community_opinions = pd.DataFrame(
+        [
+            (gym_id, climb_id, float(opinion["stars"]), opinion["votes"])
+            for (gym_id, climb_id), cs in zip(climbs, climb_stats)
+            for opinion in cs["community_opinions"]
+            if opinion["votes"] > 0
+        ],
+        columns=["gym_id", "climb_id", "stars", "votes"],
+    ).astype(COMMUNITY_OPINION_DTYPES)
+    n_toppers = [len(cs["toppers"]) for cs in climb_stats]
+    df_toppers = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "gym_id": np.repeat(
+                        np.array([gym_id for gym_id, _ in climbs], dtype=int),
+                        n_toppers,
+                    ),
+                    "climb_id": np.repeat(
+                        np.array([climb_id for _, climb_id in climbs], dtype=int),
+                        n_toppers,
+                    ),
+                }
+            ),
+            records_frame(
+                [topper for cs in climb_stats for topper in cs["toppers"]]
+            ).add_prefix("topper_"),
+        ],
+        axis=1,
+    )
+    return df_community_grades, df_community_opinions, df_toppers
+
+
+def weighted_mean(df, by, value, weight):
+    """Mean of value weighted by weight for each group of by."""
+    sums = (
+        df.assign(weighted_=df[value] * df[weight])
+        .groupby(by)[["weighted_", weight]]
+        .sum()
+    )
+    return (sums["weighted_"] / sums[weight]).rename(value)
+
+
+def weighted_mode(df, by, value, weight):
+    """Value with the largest weight for each group of by."""
+    return (
+        df.sort_values(weight, kind="stable")
+        .drop_duplicates(by, keep="last")
+        .set_index(by)[value]
+        .sort_index()
+    )
+
+
+ASCEND_DTYPES = {
+    "id": int,
+    "user_id": int,
+    "climb_id": int,
+    "topped": bool,
+    "date_logged": "datetime64[ns, UTC]",
+    "climb_gym_id": int,
+    "climb_hold_id": int,
+    "climb_setter_id": int,
+    "climb_grade": float,
+}
+
+
+def _ascends_frame(ascends, user_id):
+    if not ascends:
+        # No "climb" to normalize, e.g. a user who never logged an ascend.
+        return pd.DataFrame(
+            {col: pd.Series(dtype=dtype) for col, dtype in ASCEND_DTYPES.items()}
+        )
+    return (
         pd.DataFrame(ascends)
+        .assign(user_id=user_id)
         .pipe(json_normalize, col="climb")
         .fillna({"climb_setter_id": -1})
         .astype(
@@ -35,135 +233,464 @@ def get_user_master_tables(user_id):
         .query("topped == True")
         .assign(date_logged=lambda x: pd.to_datetime(x["date_logged"]))
     )
-    gyms = {
-        int(gym_id): (tl.gym(gym_id).includes("holds").includes("setters").execute())
-        for gym_id in df_ascends.climb_gym_id.unique()
-    }
-    for _, gym in gyms.items():
-        gym["holds"] = list2dict(gym["holds"], "id")
-        gym["setters"] = list2dict(gym["setters"], "id")
-
-    community_grades = []
-    community_opinions = []
-    toppers = []
-    for ascend in df_ascends.itertuples():
-        cs = tl.climb_stats(ascend.climb_gym_id, ascend.climb_id).execute()
-        community_grades.append(cs["community_grades"])
-        community_opinions.append(cs["community_opinions"])
-        toppers.append(cs["toppers"])
-    df_community_grades = pd.DataFrame(
-        {
-            "community_grade": community_grades,
-            "gym_id": df_ascends.climb_gym_id,
-            "climb_id": df_ascends.climb_id,
-        }
-    )
-    df_community_opinions = pd.DataFrame(
-        {
-            "community_opinion": community_opinions,
-            "gym_id": df_ascends.climb_gym_id,
-            "climb_id": df_ascends.climb_id,
-        }
-    )
-    df_toppers = (
-        pd.DataFrame(
-            {
-                "topper": toppers,
-                "gym_id": df_ascends.climb_gym_id,
-                "climb_id": df_ascends.climb_id,
-            }
+
+
+def _row_hashes(df):
+    """Hash of every row of df by id, over its columns in name order."""
+    df = df[sorted(df.columns)]
+    try:
+        hashes = pd.util.hash_pandas_object(df, index=False)
+    except TypeError:
+        # Unhashable values, e.g. lists, are hashed by their text.
+        hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return pd.Series(hashes.to_numpy(), index=df.id.to_numpy())
+
+
+class SessionIndex:
+    """Ascends of a user by session, the day they were logged.
+
+    Ascends are kept sorted by session with the row range and grade counts
+    of every session, so reading one session costs its size. update() folds
+    new and changed ascends in and drops deleted ones, re-sorting only the
+    sessions from the earliest affected one on.
+    """
+
+    def __init__(self, df_ascends=None):
+        # Serializes writers. Readers take no lock: update() builds a new
+        # state and publishes it in one assignment, and every read uses a
+        # single state.
+        self.lock = threading.Lock()
+        # Ascends, session dates ascending, the first row of each session
+        # plus the end, and ascends per session (rows) and grade label
+        # (columns).
+        self._state = (
+            pd.DataFrame(),
+            np.array([], dtype=object),
+            np.array([0]),
+            pd.DataFrame(),
         )
-        .explode("topper")
-        .reset_index(drop=True)
-        .pipe(json_normalize, col="topper")
-    )
+        # Row hash of every indexed ascend by id, to tell edited ones.
+        self._hashes = pd.Series(dtype="uint64")
+        if df_ascends is not None:
+            self.update(df_ascends)
 
-    return (
-        df_ascends.assign(
-            grade_string=lambda x: x["climb_grade"]
-            .astype(str)
-            .map(NUM2FRENCHGRADE.get)
-            .astype("string"),
-            color=lambda x: x.apply(
-                lambda row: gyms[row["climb_gym_id"]]["holds"][row["climb_hold_id"]][
-                    "brand"
-                ],
-                axis=1,
-            ),
-            hexcolor=lambda x: x.apply(
-                lambda row: gyms[row["climb_gym_id"]]["holds"][row["climb_hold_id"]][
-                    "color"
-                ],
-                axis=1,
-            ),
-            setter=lambda x: x.apply(
-                lambda row: gyms[row["climb_gym_id"]]["setters"].get(
-                    row["climb_setter_id"], {"name": ""}
-                )["name"],
-                axis=1,
-            ),
+    @property
+    def ascends(self):
+        return self._state[0]
+
+    @property
+    def dates(self):
+        return self._state[1]
+
+    @property
+    def starts(self):
+        return self._state[2]
+
+    @property
+    def grade_counts(self):
+        return self._state[3]
+
+    def update(self, df_ascends, full=False):
+        """Fold new and changed ascends in; returns how many rows changed.
+
+        Indexed ascends whose id comes back with other values are replaced.
+        With ``full=True`` df_ascends is the whole history and indexed
+        ascends missing from it are dropped.
+        """
+        with self.lock:
+            ascends, dates, starts, grade_counts = self._state
+            hashes = _row_hashes(df_ascends)
+            indexed = self._hashes.reindex(hashes.index, fill_value=0)
+            changed = hashes[hashes.ne(indexed)]
+            dropped = (
+                self._hashes.index.difference(hashes.index)
+                if full
+                else self._hashes.index[:0]
+            )
+            stale = changed.index.intersection(self._hashes.index).union(dropped)
+            if changed.empty and dropped.empty:
+                return 0
+            df_new = df_ascends[df_ascends.id.isin(changed.index)]
+            df_new = df_new.assign(session_date=df_new.date_logged.dt.date)
+            session_dates = [*df_new.session_date]
+            if not stale.empty:
+                is_stale = ascends.id.isin(stale)
+                session_dates += [*ascends.session_date[is_stale]]
+            i = np.searchsorted(dates, min(session_dates))
+            cut = starts[i]
+            df_tail = ascends.iloc[cut:]
+            if not stale.empty:
+                df_tail = df_tail[~df_tail.id.isin(stale)]
+            # Ties are broken by id, so the order does not depend on how the
+            # ascends were split across updates.
+            df_tail = pd.concat([df_tail, df_new]).sort_values(
+                ["session_date", "date_logged", "id"], ignore_index=True
+            )
+            tail_dates, firsts = np.unique(
+                df_tail.session_date.to_numpy(), return_index=True
+            )
+            counts = (
+                df_tail.groupby(["session_date", "grade_string"], observed=False)
+                .size()
+                .unstack(fill_value=0)
+            )
+            ascends = pd.concat([ascends.iloc[:cut], df_tail], ignore_index=True)
+            self._state = (
+                ascends,
+                np.concatenate([dates[:i], tail_dates]),
+                np.concatenate([starts[:i], cut + firsts, [len(ascends)]]),
+                pd.concat([grade_counts.iloc[:i], counts]),
+            )
+            self._hashes = pd.concat([self._hashes.drop(stale), changed])
+            return len(df_new) + len(dropped)
+
+    @staticmethod
+    def _position(dates, date):
+        i = np.searchsorted(dates, date)
+        if i == len(dates) or dates[i] != date:
+            raise KeyError(date)
+        return i
+
+    def session(self, date):
+        """Ascends of the session on date, in the order they were logged."""
+        ascends, dates, starts, _ = self._state
+        i = self._position(dates, date)
+        return ascends.iloc[starts[i] : starts[i + 1]]
+
+    def session_grade_counts(self, date):
+        """Ascends per grade label of the session on date."""
+        _, dates, _, grade_counts = self._state
+        return grade_counts.iloc[self._position(dates, date)]
+
+
+def get_users_master_tables(
+    user_ids,
+    gym_ids=(),
+    max_workers=DEFAULT_MAX_WORKERS,
+    incremental=True,
+    shared_stats=True,
+    refresh=False,
+):
+    """Get master tables of many users and climbs of many gyms in one plan.
+
+    Ascends of all users and climbs of all gyms are fetched concurrently;
+    gym metadata and climb stats are fetched once per unique gym and climb
+    across everything. With ``shared_stats`` stats of live climbs of gyms
+    whose gym-wide table of get_gym_climb_stats is already built (e.g. by
+    the cache warmer) come from that table; the stats of all other climbs
+    are fetched per climb, so a single climb never costs a whole gym.
+    Returns ascends of all users (with user_id), gyms, community grades,
+    community opinions, toppers and climbs of gym_ids.
+    ``refresh=True`` refetches everything bypassing the response cache and
+    memos: ascends, gym metadata, climbs and the stats of every climb, the
+    shared gym tables are not used then.
+    """
+    tl = TopLogger()
+    user_ids = list(dict.fromkeys(user_ids))
+    gym_ids = list(dict.fromkeys(int(gym_id) for gym_id in gym_ids))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        with span("user_master_tables.fetch_ascends"):
+            if incremental:
+                ascends = list(
+                    pool.map(
+                        lambda user_id: sync_user_ascends(user_id, full=refresh),
+                        user_ids,
+                    )
+                )
+            else:
+                ascends = tl.execute_all(
+                    (
+                        tl.user_ascends(user_id).includes("climb")
+                        for user_id in user_ids
+                    ),
+                    cached=not refresh,
+                    max_workers=max_workers,
+                )
+        with span("user_master_tables.build_ascends"):
+            # Users without ascends add no rows, only an empty typed frame
+            # when no user has any.
+            df_ascends = pd.concat(
+                [
+                    _ascends_frame(user_ascends, user_id)
+                    for user_id, user_ascends in zip(user_ids, ascends)
+                    if user_ascends
+                ]
+                or [_ascends_frame([], None)],
+                ignore_index=True,
+            )
+        with span("user_master_tables.gym_climbs"):
+            # Refreshing climbs refreshes the gym metadata of gym_ids too.
+            gym_climbs = list(
+                pool.map(
+                    lambda gym_id: get_gym_climbs(
+                        gym_id, cached=not refresh, refresh_circuits=refresh
+                    ),
+                    gym_ids,
+                )
+            )
+        with span("user_master_tables.gym_metadata"):
+            all_gym_ids = list(
+                dict.fromkeys([*map(int, df_ascends.climb_gym_id.unique()), *gym_ids])
+            )
+            gyms = dict(
+                zip(
+                    all_gym_ids,
+                    pool.map(
+                        lambda gym_id: get_gym_metadata(
+                            gym_id, refresh=refresh and gym_id not in gym_ids
+                        ),
+                        all_gym_ids,
+                    ),
+                )
+            )
+        with span("user_master_tables.gym_climb_stats"):
+            gym_stats = [
+                stats
+                for stats in pool.map(
+                    lambda gym_id: get_gym_climb_stats(gym_id, build=False),
+                    all_gym_ids if shared_stats and not refresh else [],
+                )
+                if stats is not None
+            ]
+
+    climbs = [
+        df_ascends[["climb_gym_id", "climb_id"]].rename(
+            columns={"climb_gym_id": "gym_id"}
         ),
+        *(df[["gym_id", "id"]].rename(columns={"id": "climb_id"}) for df in gym_climbs),
+    ]
+    df_climbs = pd.concat(climbs, ignore_index=True).astype(int).drop_duplicates()
+    with span("user_master_tables.climb_stats"):
+        df_shared = pd.concat(
+            [df_climbs.iloc[:0], *(stats[0] for stats in gym_stats)]
+        ).astype(int)
+        df_missing = df_climbs.merge(df_shared, how="left", indicator=True).query(
+            '_merge == "left_only"'
+        )
+        tables = [
+            [df]
+            for df in get_climb_stats(
+                df_missing, max_workers=max_workers, cached=not refresh
+            )
+        ]
+        for stats in gym_stats:
+            for table, df in zip(tables, stats[1:]):
+                table.append(df.merge(df_climbs))
+        df_community_grades, df_community_opinions, df_toppers = (
+            pd.concat(table, ignore_index=True) for table in tables
+        )
+        df_community_grades = df_community_grades.astype(COMMUNITY_GRADE_DTYPES)
+        df_community_opinions = df_community_opinions.astype(COMMUNITY_OPINION_DTYPES)
+
+    with span("user_master_tables.enrich"):
+        df_ascends = df_ascends.assign(
+            grade_string=lambda x: to_grade_label(x["climb_grade"]),
+        ).pipe(
+            enrich_holds_setters,
+            gym_col="climb_gym_id",
+            hold_col="climb_hold_id",
+            setter_col="climb_setter_id",
+        )
+
+    return (
+        df_ascends,
         gyms,
         df_community_grades,
         df_community_opinions,
         df_toppers,
+        pd.concat(gym_climbs, ignore_index=True) if gym_climbs else pd.DataFrame(),
     )
 
 
-def get_gym_climbs(gym_id, cached=True):
-    tl = TopLogger()
-    climbs = tl.climbs(gym_id).execute(cached=cached)
-    gym_holds = get_gym_holds_dict(gym_id)
-    gym_setters = get_gym_setters_dict(gym_id)
-
-    df_climbs = (
-        pd.DataFrame(climbs)
-        .query("lived == True")
-        .astype({"setter_id": "Int64"})
-        .assign(
-            grade_str=lambda x: x["grade"].map(NUM2FRENCHGRADE.get).astype("string"),
-            color=lambda x: x["hold_id"].map(lambda y: gym_holds[y]["brand"]),
-            hexcolor=lambda x: x["hold_id"].map(lambda y: gym_holds[y]["color"]),
-            setter=lambda x: x["setter_id"].map(
-                lambda y: gym_setters.get(y, {"name": ""})["name"], na_action="ignore"
-            ),
-        )
-        .astype(
+def get_user_master_tables(
+    user_id, max_workers=DEFAULT_MAX_WORKERS, incremental=True, refresh=False
+):
+    return get_users_master_tables(
+        [user_id], max_workers=max_workers, incremental=incremental, refresh=refresh
+    )[:5]
+
+
+USER_SNAPSHOT_MAX_AGE = timedelta(hours=1)
+GYM_SNAPSHOT_MAX_AGE = timedelta(days=1)
+
+
+def load_user_master_tables(user_id, max_age=USER_SNAPSHOT_MAX_AGE, refresh=False):
+    """Get user master tables from the latest snapshot, rebuilding it if stale.
+
+    ``refresh=True`` rebuilds it from a full redownload of the ascends.
+    """
+    frames = None if refresh else load_snapshot("users", user_id, max_age)
+    if frames is None:
+        (
+            df_ascends,
+            gyms,
+            df_community_grades,
+            df_community_opinions,
+            df_toppers,
+        ) = get_user_master_tables(user_id, refresh=refresh)
+        save_snapshot(
+            "users",
+            user_id,
             {
-                "grade": float,
-            }
+                "ascends": df_ascends,
+                "community_grades": df_community_grades,
+                "community_opinions": df_community_opinions,
+                "toppers": df_toppers,
+            },
         )
+        return df_ascends, gyms, df_community_grades, df_community_opinions, df_toppers
+
+    gyms = {
+        int(gym_id): get_gym_metadata(gym_id)
+        for gym_id in frames["ascends"].climb_gym_id.unique()
+    }
+    return (
+        frames["ascends"],
+        gyms,
+        frames["community_grades"],
+        frames["community_opinions"],
+        frames["toppers"],
     )
 
-    for gym_id in df_climbs.gym_id.unique():
-        df_challenge = (
-            pd.DataFrame(tl.groups(int(gym_id)).includes("climb_groups").execute())
-            .explode("climb_groups")
-            .pipe(json_normalize, col="climb_groups")
-            .drop(
-                columns=[
-                    "gym_id",
-                    "order",
-                    "live",
-                    "lived",
-                    "climbs_type",
-                    "score_system",
-                    "approve_participation",
-                    "split_gender",
-                    "climb_groups_order",
-                    "split_age",
-                ]
+
+def load_gym_climbs(gym_id, max_age=GYM_SNAPSHOT_MAX_AGE, refresh=False):
+    """Get gym climbs from the latest snapshot, rebuilding it if stale."""
+    frames = None if refresh else load_snapshot("gyms", gym_id, max_age)
+    if frames is None:
+        df_climbs = get_gym_climbs(gym_id, cached=not refresh)
+        save_snapshot("gyms", gym_id, {"climbs": df_climbs})
+        return df_climbs
+    return frames["climbs"]
+
+
+GYM_STATS_MAX_AGE = timedelta(hours=1)
+
+_gym_climb_stats = {}
+
+
+def get_gym_climb_stats(
+    gym_id, max_age=GYM_STATS_MAX_AGE, refresh=False, build=True, df_climbs=None
+):
+    """Get stats of all live climbs of gym, shared by all users.
+
+    Returns the covered climbs (gym_id, climb_id) and their community grades,
+    community opinions and toppers as in get_climb_stats. The tables are
+    stored and refreshed as a unit: memoized per process, snapshotted and
+    rebuilt from the response cache once older than max_age, or from fresh
+    responses with ``refresh=True``. With ``build=False`` returns None
+    instead of building. A rebuild uses the live climbs of df_climbs (e.g.
+    of get_gym_climbs) when given, instead of fetching them again.
+    """
+    gym_id = int(gym_id)
+    if not refresh and is_fresh(_gym_climb_stats, gym_id, max_age):
+        return _gym_climb_stats[gym_id][1]
+    snapshot = None if refresh else load_snapshot("gym_stats", gym_id, max_age)
+    if snapshot is None:
+        if not build:
+            return None
+        if df_climbs is None:
+            df_climbs = frame_from_chunks(
+                TopLogger().climbs(gym_id).iter_records(cached=not refresh),
+                query="lived == True",
             )
-            .rename(columns={"name": "circuit_name"})
-            .reset_index()
+        df_climbs = (
+            df_climbs
+            # A gym without climbs has no columns at all.
+            .reindex(columns=["gym_id", "id"])
+            .drop_duplicates()
+            .astype(int)
+            .rename(columns={"id": "climb_id"})
         )
-        df_climbs = df_climbs.merge(
-            df_challenge, how="left", left_on="id", right_on="climb_groups_climb_id"
-        )
-    return df_climbs.fillna({"circuit_name": "", "remarks": ""}).assign(
-        number=lambda x: x.number.str.extract(
-            r"(\d+)",
+        snapshot = dict(
+            zip(
+                ["community_grades", "community_opinions", "toppers"],
+                get_climb_stats(df_climbs, cached=not refresh),
+            ),
+            climbs=df_climbs,
         )
-        .fillna(-1)
-        .astype(int),
+        save_snapshot("gym_stats", gym_id, snapshot)
+    stats = (
+        snapshot["climbs"],
+        snapshot["community_grades"],
+        snapshot["community_opinions"],
+        snapshot["toppers"],
     )
+    _gym_climb_stats[gym_id] = (time.time(), stats)
+    return stats
+
+
+def clear_gym_climb_stats():
+    """Forget memoized gym climb stats; snapshots are kept."""
+    _gym_climb_stats.clear()
+
+
+_gym_circuits = {}
+
+
+def get_gym_circuits(gym_ids, refresh=False, max_age=GYM_METADATA_MAX_AGE):
+    """Get climb to circuit lookup of gyms, indexed by climb id.
+
+    A climb in several circuits has a row for each. Memoized per gym set for
+    max_age, independently of climbs; ``refresh=True`` refetches the groups.
+    """
+    key = tuple(sorted(int(gym_id) for gym_id in gym_ids))
+    if refresh or not is_fresh(_gym_circuits, key, max_age):
+        df_circuits = pd.DataFrame(
+            [
+                (climb_group["climb_id"], group["id"], group["name"])
+                for gym_id in key
+                for group in get_gym_groups(gym_id, refresh=refresh)
+                for climb_group in group.get("climb_groups", [])
+            ],
+            columns=["climb_id", "circuit_id", "circuit_name"],
+        ).set_index("climb_id")
+        _gym_circuits[key] = (time.time(), df_circuits)
+    return _gym_circuits[key][1]
+
+
+def clear_gym_circuits():
+    """Drop all memoized circuit lookups."""
+    _gym_circuits.clear()
+
+
+def get_gym_climbs(gym_id, cached=True, refresh_circuits=False):
+    tl = TopLogger()
+    with span("gym_climbs.fetch_climbs"):
+        if not cached:
+            get_gym_metadata(gym_id, refresh=True)
+        # Only fetched here, records are decoded while building the frame.
+        chunks = tl.climbs(gym_id).iter_records(cached=cached)
+
+    with span("gym_climbs.build_climbs"):
+        df_climbs = (
+            frame_from_chunks(chunks, query="lived == True")
+            .astype({"setter_id": "Int64"})
+            .assign(
+                grade_str=lambda x: to_grade_label(x["grade"]),
+            )
+            .pipe(enrich_holds_setters)
+            .astype(
+                {
+                    "grade": float,
+                }
+            )
+        )
+
+    with span("gym_climbs.circuits"):
+        df_climbs = (
+            df_climbs.merge(
+                get_gym_circuits(df_climbs.gym_id.unique(), refresh=refresh_circuits),
+                how="left",
+                left_on="id",
+                right_index=True,
+            )
+            .fillna({"circuit_name": "", "remarks": ""})
+            .assign(
+                number=lambda x: x.number.str.extract(
+                    r"(\d+)",
+                )
+                .fillna(-1)
+                .astype(int),
+            )
+        )
+    return df_climbs
@@ -1,8 +1,11 @@
+import inspect
 import json
-from typing import Any
+from typing import Any, Iterator, List
 
 import requests
 
+from .streaming import chunked, iter_response_records
+
 
 def chainable(method):
     def wrapper(self, *args, **kwargs):
@@ -60,5 +63,43 @@ class RequestBuilder:
             self.method, self.url, params=self.params, data=self.data
         ).prepare()
 
-    def execute(self, cached=True) -> Any:
-        return self.executor.send(self.build(), cached=cached)
+    def execute(self, cached=True, model=None) -> Any:
+        """Send the request; returns an awaitable for async executors.
+
+        With ``model``, a type of toplogger.models such as List[Climb], the
+        response is decoded straight into typed records instead of dicts.
+        """
+        if model is None:
+            return self.executor.send(self.build(), cached=cached)
+        from .models import decoder
+
+        return self.executor.send(self.build(), cached=cached, decode=decoder(model))
+
+    def iter_records(
+        self, chunk_size=1000, cached=True, model=None
+    ) -> Iterator[List[Any]]:
+        """Yield records of a list endpoint in lists of up to chunk_size.
+
+        The JSON array is decoded as iter_response_records does: at once
+        when small, incrementally otherwise. With a record
+        ``model`` (e.g. Climb) the array is decoded at once into compact
+        typed records instead. For async executors returns an awaitable of
+        the chunks.
+        """
+        if model is None:
+            records = self.executor.send(
+                self.build(), cached=cached, decode=iter_response_records
+            )
+        else:
+            from .models import decoder
+
+            records = self.executor.send(
+                self.build(), cached=cached, decode=decoder(List[model])
+            )
+        if inspect.isawaitable(records):
+            return _chunked_async(records, chunk_size)
+        return chunked(records, chunk_size)
+
+
+async def _chunked_async(records, chunk_size) -> Iterator[List[Any]]:
+    return chunked(await records, chunk_size)
@@ -0,0 +1,455 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests_cache
+from requests_cache.backends.base import BaseStorage, DictStorage
+from requests_cache.backends.sqlite import SQLiteDict
+from requests_cache.serializers import pickle_serializer, utf8_encoder
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, every process evicts there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Cache backend of the shared session: "memory", "sqlite", "filesystem" or
+# "redis". SQLite and filesystem caches are shared by processes in the same
+# working directory, Redis by every process pointed at the same server.
+CACHE_BACKEND = os.environ.get("TOPLOGGER_CACHE_BACKEND", "sqlite")
+CACHE_NAME = os.environ.get("TOPLOGGER_CACHE_NAME", "http_cache")
+REDIS_URL = os.environ.get("TOPLOGGER_REDIS_URL", "redis://localhost:6379/0")
+# Responses kept at most; the soonest expiring (least recently used in
+# memory) are evicted first.
+CACHE_MAX_SIZE = int(os.environ.get("TOPLOGGER_CACHE_MAX_SIZE", 100_000))
+# Expired responses stored longer ago are evicted even if they could be
+# revalidated; ones with an ETag or Last-Modified are kept until then.
+CACHE_MAX_AGE = timedelta(
+    seconds=float(os.environ.get("TOPLOGGER_CACHE_MAX_AGE", 14 * 24 * 3600))
+)
+EVICT_INTERVAL = timedelta(minutes=5)
+
+_connection = None
+_evictor = None
+_evictor_lock = threading.Lock()
+# Cache status counts of the responses served from each cache.
+_counts: "weakref.WeakKeyDictionary[Any, Counter]" = weakref.WeakKeyDictionary()
+_counts_lock = threading.Lock()
+
+
+class LRUDictStorage(DictStorage):
+    """In-memory storage dropping the least recently used item past max_size."""
+
+    def __init__(self, max_size: Optional[int] = None):
+        super().__init__()
+        self.max_size = max_size
+        self.lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self.lock:
+            self.data[key] = self.data.pop(key)
+            return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = value
+            while self.max_size is not None and len(self.data) > self.max_size:
+                del self.data[next(iter(self.data))]
+
+    def __delitem__(self, key):
+        with self.lock:
+            del self.data[key]
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.data))
+
+
+class RedisHashStorage(BaseStorage):
+    """Storage in one Redis hash, needing only the hash commands of a client.
+
+    Works with a redis.Redis client or the LocalRedis stand-in. Entries do
+    not expire by themselves, evict() removes them like for other backends.
+    """
+
+    def __init__(self, connection: Any, name: str, serializer: Any = None):
+        super().__init__(serializer=serializer)
+        self.connection = connection
+        self.name = name
+
+    def __getitem__(self, key):
+        value = self.connection.hget(self.name, key)
+        if value is None:
+            raise KeyError(key)
+        return self.deserialize(key, value)
+
+    def __setitem__(self, key, value):
+        self.connection.hset(self.name, key, self.serialize(value))
+
+    def __delitem__(self, key):
+        if not self.connection.hdel(self.name, key):
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in self.connection.hkeys(self.name):
+            yield key.decode() if isinstance(key, bytes) else key
+
+    def __len__(self):
+        return self.connection.hlen(self.name)
+
+    def bulk_delete(self, keys: Iterable[str]):
+        keys = list(keys)
+        if keys:
+            self.connection.hdel(self.name, *keys)
+
+    def clear(self):
+        self.connection.delete(self.name)
+
+
+class LocalRedis:
+    """In-process stand-in for a Redis server, with the hash commands only.
+
+    Lets the redis backend run (e.g. in tests and benchmarks) without the
+    redis package or a server. Values are kept as bytes, like Redis does.
+    """
+
+    def __init__(self):
+        self.hashes: Dict[str, Dict[str, bytes]] = {}
+        self.lock = threading.Lock()
+
+    def hget(self, name: str, key: str) -> Optional[bytes]:
+        with self.lock:
+            return self.hashes.get(name, {}).get(key)
+
+    def hset(self, name: str, key: str, value: Any) -> int:
+        value = value.encode() if isinstance(value, str) else bytes(value)
+        with self.lock:
+            fields = self.hashes.setdefault(name, {})
+            new = key not in fields
+            fields[key] = value
+            return int(new)
+
+    def hdel(self, name: str, *keys: str) -> int:
+        with self.lock:
+            fields = self.hashes.get(name, {})
+            return sum(fields.pop(key, None) is not None for key in keys)
+
+    def hkeys(self, name: str) -> List[str]:
+        with self.lock:
+            return list(self.hashes.get(name, {}))
+
+    def hlen(self, name: str) -> int:
+        with self.lock:
+            return len(self.hashes.get(name, {}))
+
+    def delete(self, *names: str) -> int:
+        with self.lock:
+            return sum(self.hashes.pop(name, None) is not None for name in names)
+
+
+def make_backend(
+    backend: Optional[str] = None,
+    cache_name: Optional[str] = None,
+    max_size: Optional[int] = None,
+    connection: Any = None,
+) -> requests_cache.BaseCache:
+    """Create a cache backend, by default the configured one.
+
+    ``connection`` is the client of the redis backend: a redis.Redis client
+    or a LocalRedis stand-in. By default one is made from REDIS_URL, which
+    needs the redis extra.
+    """
+    backend = CACHE_BACKEND if backend is None else backend
+    cache_name = CACHE_NAME if cache_name is None else cache_name
+    max_size = CACHE_MAX_SIZE if max_size is None else max_size
+    connection = _connection if connection is None else connection
+    if backend == "memory":
+        cache = requests_cache.BaseCache(cache_name)
+        cache.responses = LRUDictStorage(max_size)
+        cache.redirects = LRUDictStorage(max_size)
+        return cache
+    if backend == "sqlite":
+        # WAL lets readers in other processes proceed while one writes.
+        return requests_cache.SQLiteCache(cache_name, wal=True, busy_timeout=30_000)
+    if backend == "filesystem":
+        return requests_cache.FileCache(cache_name)
+    if backend == "redis":
+        if connection is None:
+            from redis import Redis
+
+            connection = Redis.from_url(REDIS_URL)
+        cache = requests_cache.BaseCache(cache_name)
+        cache.responses = RedisHashStorage(
+            connection, f"{cache_name}:responses", pickle_serializer
+        )
+        cache.redirects = RedisHashStorage(
+            connection, f"{cache_name}:redirects", utf8_encoder
+        )
+        return cache
+    raise ValueError(f"Unknown cache backend {backend!r}")
+
+
+def is_shared(cache: requests_cache.BaseCache) -> bool:
+    """Whether cache is shared with other processes, i.e. not in memory."""
+    return not isinstance(cache.responses, DictStorage)
+
+
+def configure_cache(
+    backend: Optional[str] = None,
+    cache_name: Optional[str] = None,
+    max_size: Optional[int] = None,
+    max_age: Optional[timedelta] = None,
+    connection: Any = None,
+) -> None:
+    """Change the cache of the shared session, for clients created afterwards.
+
+    Arguments left as None keep their current setting.
+    """
+    global CACHE_BACKEND, CACHE_NAME, CACHE_MAX_SIZE, CACHE_MAX_AGE, _connection
+    from . import toplogger
+
+    CACHE_BACKEND = CACHE_BACKEND if backend is None else backend
+    CACHE_NAME = CACHE_NAME if cache_name is None else cache_name
+    CACHE_MAX_SIZE = CACHE_MAX_SIZE if max_size is None else max_size
+    CACHE_MAX_AGE = CACHE_MAX_AGE if max_age is None else max_age
+    _connection = _connection if connection is None else connection
+    with toplogger._session_lock:
+        if toplogger._session is not None:
+            stop_evictor()
+            toplogger._session.close()
+        toplogger._session = None
+
+
+def _revalidatable(response) -> bool:
+    return "ETag" in response.headers or "Last-Modified" in response.headers
+
+
+def _stale(response, max_age: timedelta) -> bool:
+    """Whether an expired response can no longer be used or is past max_age."""
+    return (
+        response is None
+        or not _revalidatable(response)
+        or response.is_older_than(max_age)
+    )
+
+
+def _stale_keys(cache: requests_cache.BaseCache, max_age: timedelta) -> List[str]:
+    if isinstance(cache.responses, SQLiteDict):
+        # Only expired rows are read, the expires column is indexed.
+        responses = cache.responses
+        with responses.connection() as con:
+            rows = con.execute(
+                f"SELECT key, value FROM {responses.table_name} WHERE expires <= ?",
+                (round(time.time()),),
+            ).fetchall()
+        return [
+            key
+            for key, value in rows
+            if _stale(responses.deserialize(key, value), max_age)
+        ]
+    stale = []
+    for key in list(cache.responses.keys()):
+        response = cache.get_response(key)
+        if response is None or (response.is_expired and _stale(response, max_age)):
+            stale.append(key)
+    return stale
+
+
+_NEVER = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def _soonest_expiring_keys(cache: requests_cache.BaseCache, limit: int) -> List[str]:
+    """Keys of the limit soonest expiring responses, never expiring ones last."""
+    if isinstance(cache.responses, SQLiteDict):
+        responses = cache.responses
+        with responses.connection() as con:
+            rows = con.execute(
+                f"SELECT key FROM {responses.table_name}"
+                " ORDER BY expires IS NULL, expires LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [key for (key,) in rows]
+    items = sorted(
+        cache.responses.items(),
+        key=lambda item: item[1].expires or _NEVER,
+    )
+    return [key for key, _ in items[:limit]]
+
+
+def _delete(cache: requests_cache.BaseCache, keys: List[str]) -> None:
+    if isinstance(cache, requests_cache.SQLiteCache):
+        # Vacuuming would hold the write lock over the whole file.
+        cache.delete(*keys, vacuum=False)
+    else:
+        cache.delete(*keys)
+
+
+def evict(
+    cache: requests_cache.BaseCache,
+    max_size: Optional[int] = None,
+    max_age: Optional[timedelta] = None,
+) -> int:
+    """Delete responses that can no longer be used and ones past the limits.
+
+    Deletes unreadable responses and expired ones that have no ETag or
+    Last-Modified to revalidate with or were stored longer ago than max_age,
+    then, past max_size, the soonest expiring ones. Limits default to
+    CACHE_MAX_SIZE and CACHE_MAX_AGE. The SQLite backend is filtered in SQL
+    and only its expired responses are read; other backends read every
+    stored response. Returns the number of deleted responses.
+    """
+    max_size = CACHE_MAX_SIZE if max_size is None else max_size
+    max_age = CACHE_MAX_AGE if max_age is None else max_age
+    before = len(cache.responses)
+    stale = _stale_keys(cache, max_age)
+    if stale:
+        _delete(cache, stale)
+    excess = len(cache.responses) - max_size
+    if excess > 0:
+        _delete(cache, _soonest_expiring_keys(cache, excess))
+    return before - len(cache.responses)
+
+
+class CacheEvictor(threading.Thread):
+    """Daemon thread running evict on a cache every interval until stopped.
+
+    With a ``lock_path`` only the evictor holding an exclusive lock on that
+    file evicts, so processes sharing a cache elect one evicting process
+    among them. The others retry the lock every interval and take over when
+    the owner exits.
+    """
+
+    def __init__(
+        self,
+        cache: requests_cache.BaseCache,
+        interval: timedelta = EVICT_INTERVAL,
+        lock_path: Optional[str] = None,
+    ):
+        super().__init__(name="toplogger-cache-evictor", daemon=True)
+        self.cache = cache
+        self.interval = interval
+        self.lock_path = lock_path
+        self.lock_file = None
+        self.stopped = threading.Event()
+
+    def owns_cache(self) -> bool:
+        """Whether this evictor holds the lock, taking it when free."""
+        if self.lock_path is None or fcntl is None or self.lock_file is not None:
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self.lock_file = lock_file
+        return True
+
+    def run(self) -> None:
+        try:
+            while not self.stopped.wait(self.interval.total_seconds()):
+                try:
+                    if self.owns_cache():
+                        evicted = evict(self.cache)
+                        logger.debug("Evicted %d cached responses", evicted)
+                except Exception:
+                    logger.exception("Cache eviction failed")
+        finally:
+            if self.lock_file is not None:
+                # Closing releases the lock for the other processes.
+                self.lock_file.close()
+                self.lock_file = None
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+def start_evictor(
+    cache: requests_cache.BaseCache, interval: timedelta = EVICT_INTERVAL
+) -> CacheEvictor:
+    """Evict from cache in the background, replacing the running evictor.
+
+    Started by the shared session of every process. Of the processes sharing
+    a cache only one evicts at a time, elected with a lock file next to the
+    cache (``<cache name>.evict.lock``).
+    """
+    global _evictor
+    lock_path = f"{cache.cache_name}.evict.lock" if is_shared(cache) else None
+    with _evictor_lock:
+        if _evictor is not None:
+            _evictor.stop()
+        _evictor = CacheEvictor(cache, interval, lock_path)
+        _evictor.start()
+        return _evictor
+
+
+def stop_evictor() -> None:
+    """Stop background eviction started by start_evictor."""
+    global _evictor
+    with _evictor_lock:
+        if _evictor is not None:
+            _evictor.stop()
+        _evictor = None
+
+
+def count(cache: requests_cache.BaseCache, status: str) -> None:
+    """Count a response of cache status status served through cache."""
+    with _counts_lock:
+        _counts.setdefault(cache, Counter())[status] += 1
+
+
+@dataclass
+class CacheStats:
+    backend: str
+    entries: int
+    expired: int
+    size_bytes: Optional[int]
+    max_size: Optional[int]
+    max_age: Optional[timedelta]
+    hits: int
+    misses: int
+    revalidated: int
+    coalesced: int
+
+
+def cache_stats(cache: Optional[requests_cache.BaseCache] = None) -> CacheStats:
+    """Stats of cache, by default the one of the shared session.
+
+    Hits, misses, revalidations and requests coalesced into one in flight are
+    the ones of requests sent through cache by this process since start.
+    Entries of the SQLite backend are counted in SQL, other backends read
+    every stored response.
+    """
+    from .toplogger import get_session
+
+    cache = get_session().cache if cache is None else cache
+    if isinstance(cache.responses, SQLiteDict):
+        entries = cache.responses.count()
+        expired = entries - cache.responses.count(expired=False)
+    else:
+        responses = list(cache.responses.values())
+        entries = len(responses)
+        expired = sum(response.is_expired for response in responses)
+    size = getattr(cache.responses, "size", None)
+    with _counts_lock:
+        counts = Counter(_counts.get(cache, {}))
+    return CacheStats(
+        backend=type(cache).__name__,
+        entries=entries,
+        expired=expired,
+        size_bytes=size() if callable(size) else None,
+        max_size=CACHE_MAX_SIZE,
+        max_age=CACHE_MAX_AGE,
+        hits=counts.get("hit", 0),
+        misses=counts.get("miss", 0),
+        revalidated=counts.get("revalidate", 0),
+        coalesced=counts.get("coalesced", 0),
+    )
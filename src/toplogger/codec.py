@@ -0,0 +1,19 @@
+import json
+from typing import Any
+
+import requests
+
+try:
+    import orjson
+except ImportError:  # optional, see the "fast" extra
+    orjson = None
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON, with orjson when it is installed."""
+    return json.loads(data) if orjson is None else orjson.loads(data)
+
+
+def decode_json(res: requests.Response) -> Any:
+    """Decode a JSON response body."""
+    return loads(res.content)
@@ -0,0 +1,28 @@
+import re
+from typing import Optional
+
+RE_GYM_CLIMB = re.compile(r"/gyms/(\d+)(?:/climbs/(\d+))?")
+
+
+class TopLoggerError(Exception):
+    """Request to the TopLogger API failed."""
+
+    def __init__(self, message: str, url: Optional[str] = None):
+        super().__init__(message)
+        self.url = url
+        match = RE_GYM_CLIMB.search(url or "")
+        self.gym_id = int(match[1]) if match else None
+        self.climb_id = int(match[2]) if match and match[2] else None
+
+
+class TopLoggerHTTPError(TopLoggerError):
+    """TopLogger API answered with an error status."""
+
+    def __init__(self, status_code: int, url: str, text: str):
+        super().__init__(f"[{status_code}] {url}: {text}", url)
+        self.status_code = status_code
+        self.text = text
+
+
+class TopLoggerRateLimitError(TopLoggerHTTPError):
+    """TopLogger API kept answering 429 Too Many Requests."""
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from .utils import NUM2FRENCHGRADE
+
+# Numeric grades, ascending, and the French label of each.
+GRADES = np.array(sorted(float(grade) for grade in NUM2FRENCHGRADE))
+GRADE_LABELS = np.array([NUM2FRENCHGRADE[str(grade)] for grade in GRADES])
+GRADE_DTYPE = pd.CategoricalDtype(list(dict.fromkeys(GRADE_LABELS)), ordered=True)
+_GRADE_CODES = GRADE_DTYPE.categories.get_indexer(GRADE_LABELS)
+
+
+def grade_index(grades) -> np.ndarray:
+    """Index into GRADES of the nearest known grade, -1 for missing."""
+    values = pd.to_numeric(pd.Series(grades), errors="coerce").to_numpy(dtype=float)
+    idx = np.searchsorted(GRADES, values).clip(1, len(GRADES) - 1)
+    idx -= values - GRADES[idx - 1] <= GRADES[idx] - values
+    return np.where(np.isnan(values), -1, idx)
+
+
+def to_grade_label(grades: pd.Series) -> pd.Series:
+    """Map numeric (or numeric string) grades to ordered French grade labels."""
+    idx = grade_index(grades)
+    codes = np.where(idx == -1, -1, _GRADE_CODES[idx])
+    return pd.Series(
+        pd.Categorical.from_codes(codes, dtype=GRADE_DTYPE),
+        index=grades.index,
+        name=grades.name,
+    )
@@ -0,0 +1,212 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Union
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RE_ID = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_of(url: str) -> str:
+    """Endpoint of url with ids replaced, e.g. ``/v1/gyms/{id}/climbs``."""
+    path = re.sub(r"^[a-z]+://[^/]+", "", url).split("?", 1)[0]
+    return RE_ID.sub("/{id}", path)
+
+
+@dataclass
+class RequestEvent:
+    endpoint: str
+    url: str
+    status_code: int
+    latency: float
+    decode_time: float
+    bytes: int
+    cache: str  # "hit", "miss", "revalidate" or "coalesced"
+
+
+@dataclass
+class SpanEvent:
+    name: str
+    duration: float
+
+
+Event = Union[RequestEvent, SpanEvent]
+
+
+@dataclass
+class Histogram:
+    buckets: tuple = LATENCY_BUCKETS
+    counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    sum: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Aggregates request and span events per endpoint / span name."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.cache = {}
+        self.bytes = {}
+        self.decode_time = {}
+        self.spans = {}
+
+    def __call__(self, event: Event) -> None:
+        with self.lock:
+            if isinstance(event, SpanEvent):
+                self.spans.setdefault(event.name, Histogram()).observe(event.duration)
+                return
+            endpoint = event.endpoint
+            self.latency.setdefault(endpoint, Histogram()).observe(event.latency)
+            counts = self.cache.setdefault(endpoint, {})
+            counts[event.cache] = counts.get(event.cache, 0) + 1
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + event.bytes
+            self.decode_time[endpoint] = (
+                self.decode_time.get(endpoint, 0.0) + event.decode_time
+            )
+
+    def summary(self) -> dict:
+        """Summary of recorded events as plain dict."""
+        with self.lock:
+            return {
+                "requests": {
+                    endpoint: {
+                        "count": histogram.count,
+                        "latency_sum": histogram.sum,
+                        "latency_buckets": dict(
+                            zip([*histogram.buckets, float("inf")], histogram.counts)
+                        ),
+                        "cache": dict(self.cache[endpoint]),
+                        "bytes": self.bytes[endpoint],
+                        "decode_time": self.decode_time[endpoint],
+                    }
+                    for endpoint, histogram in self.latency.items()
+                },
+                "spans": {
+                    name: {"count": histogram.count, "duration_sum": histogram.sum}
+                    for name, histogram in self.spans.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Recorded events in Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            lines.append("# TYPE toplogger_request_duration_seconds histogram")
+            for endpoint, histogram in self.latency.items():
+                cumulative = 0
+                for le, count in zip(
+                    [*map(str, histogram.buckets), "+Inf"], histogram.counts
+                ):
+                    cumulative += count
+                    lines.append(
+                        "toplogger_request_duration_seconds_bucket"
+                        f'{{endpoint="{endpoint}",le="{le}"}} {cumulative}'
+                    )
+                labels = f'{{endpoint="{endpoint}"}}'
+                lines.append(
+                    f"toplogger_request_duration_seconds_sum{labels} {histogram.sum}"
+                )
+                lines.append(
+                    f"toplogger_request_duration_seconds_count{labels} {histogram.count}"
+                )
+            lines.append("# TYPE toplogger_requests_total counter")
+            for endpoint, counts in self.cache.items():
+                for cache, count in counts.items():
+                    lines.append(
+                        "toplogger_requests_total"
+                        f'{{endpoint="{endpoint}",cache="{cache}"}} {count}'
+                    )
+            lines.append("# TYPE toplogger_response_bytes_total counter")
+            for endpoint, size in self.bytes.items():
+                lines.append(
+                    f'toplogger_response_bytes_total{{endpoint="{endpoint}"}} {size}'
+                )
+            lines.append("# TYPE toplogger_decode_seconds_total counter")
+            for endpoint, seconds in self.decode_time.items():
+                lines.append(
+                    f'toplogger_decode_seconds_total{{endpoint="{endpoint}"}} {seconds}'
+                )
+            lines.append("# TYPE toplogger_span_duration_seconds summary")
+            for name, histogram in self.spans.items():
+                labels = f'{{span="{name}"}}'
+                lines.append(
+                    f"toplogger_span_duration_seconds_sum{labels} {histogram.sum}"
+                )
+                lines.append(
+                    f"toplogger_span_duration_seconds_count{labels} {histogram.count}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+_subscribers: List[Callable[[Event], None]] = [METRICS]
+_subscribers_lock = threading.Lock()
+
+
+def subscribe(callback: Callable[[Event], None]) -> Callable[[], None]:
+    """Call callback with every request and span event; returns unsubscribe."""
+    with _subscribers_lock:
+        _subscribers.append(callback)
+
+    def unsubscribe():
+        with _subscribers_lock:
+            _subscribers.remove(callback)
+
+    return unsubscribe
+
+
+def emit(event: Event) -> None:
+    for callback in list(_subscribers):
+        callback(event)
+
+
+@contextmanager
+def collect() -> Iterator[Metrics]:
+    """Collect events emitted inside the block into fresh Metrics."""
+    metrics = Metrics()
+    unsubscribe = subscribe(metrics)
+    try:
+        yield metrics
+    finally:
+        unsubscribe()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the block and emit it as a span event."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit(SpanEvent(name, time.perf_counter() - start))
+
+
+def timed_iter(items: Iterator[Any], name: str) -> Iterator[Any]:
+    """Yield items, emitting the time spent producing them as a span event.
+
+    Only the time inside the iterator counts, not the consumer's; the span
+    is emitted once the iterator is exhausted or closed.
+    """
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        emit(SpanEvent(name, elapsed))
@@ -0,0 +1,128 @@
+"""Typed records of TopLogger API responses.
+
+Responses decoded into these msgspec structs skip the intermediate dicts:
+only declared fields are kept, unknown ones are never materialized. Records
+can be read like the dicts they replace (``record["grade"]``), so consumers
+work with either. Requires the optional msgspec dependency.
+
+    tl.climbs(206).execute(model=List[Climb])
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Union
+
+import msgspec
+import pandas as pd
+import requests
+
+
+class Record(msgspec.Struct):
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+
+class Hold(Record):
+    id: int
+    brand: Optional[str] = None
+    color: Optional[str] = None
+
+
+class Setter(Record):
+    id: int
+    name: Optional[str] = None
+
+
+class Gym(Record):
+    id: int
+    name: Optional[str] = None
+    holds: List[Hold] = []
+    setters: List[Setter] = []
+
+
+class Climb(Record):
+    id: int
+    gym_id: int
+    hold_id: Optional[int] = None
+    setter_id: Optional[int] = None
+    grade: Union[float, str, None] = None
+    lived: bool = False
+    live: bool = False
+    number: Optional[str] = None
+    remarks: Optional[str] = None
+    average_opinion: Optional[float] = None
+    date_live_start: Optional[str] = None
+
+
+class Ascend(Record):
+    id: int
+    user_id: int
+    climb_id: int
+    topped: bool = False
+    checks: Optional[int] = None
+    date_logged: Optional[str] = None
+    climb: Optional[Climb] = None
+
+
+class ClimbGroup(Record):
+    climb_id: int
+    order: Optional[int] = None
+
+
+class Group(Record):
+    id: int
+    name: Optional[str] = None
+    gym_id: Optional[int] = None
+    live: bool = False
+    climb_groups: List[ClimbGroup] = []
+
+
+class CommunityGrade(Record):
+    grade: Union[float, str]
+    count: int
+
+
+class CommunityOpinion(Record):
+    stars: float
+    votes: int
+
+
+class Topper(Record):
+    user_id: int
+    date: Optional[str] = None
+
+
+class ClimbStats(Record):
+    community_grades: List[CommunityGrade] = []
+    community_opinions: List[CommunityOpinion] = []
+    toppers: List[Topper] = []
+
+
+@lru_cache(maxsize=None)
+def decoder(model: Any) -> Callable[[requests.Response], Any]:
+    """Response decoder into model, e.g. Climb or List[Climb]."""
+    decode = msgspec.json.Decoder(model).decode
+    return lambda res: decode(res.content)
+
+
+def to_frame(records: List[Record]) -> pd.DataFrame:
+    """DataFrame with a column per field of records.
+
+    Nested records are flattened into ``<field>_<nested field>`` columns,
+    same as pandas.json_normalize does with dicts.
+    """
+    if not records:
+        return pd.DataFrame()
+    columns = {}
+    for name in records[0].__struct_fields__:
+        values = [getattr(record, name) for record in records]
+        present = [i for i, value in enumerate(values) if value is not None]
+        if present and isinstance(values[present[0]], Record):
+            flat = to_frame([values[i] for i in present]).set_axis(present)
+            flat = flat.reindex(range(len(values)))
+            columns.update({f"{name}_{col}": flat[col] for col in flat})
+        else:
+            columns[name] = values
+    return pd.DataFrame(columns)
@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+
+# Requests per second sent to the API by this process, and how many may be
+# sent at once after a quiet period. Cache hits are not limited.
+DEFAULT_RATE = float(os.environ.get("TOPLOGGER_RATE_LIMIT", 10.0))
+DEFAULT_BURST = int(os.environ.get("TOPLOGGER_RATE_BURST", 10))
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` requests per second."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: int = DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, blocking until one is available and not paused."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self.updated) * self.rate
+                    )
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for seconds, e.g. after a 429 with Retry-After.
+
+        The bucket starts empty again afterwards, so waiting requests resume
+        at the rate instead of in one burst.
+        """
+        with self.lock:
+            until = time.monotonic() + seconds
+            if until > self.paused_until:
+                self.paused_until = until
+                self.tokens = 0.0
+                self.updated = until
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTP adapter taking a token before each request that hits the network.
+
+    Mounted under the cache, so cache hits are not rate limited.
+    """
+
+    def __init__(self, limiter: TokenBucket, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        return super().send(request, **kwargs)
+
+
+RATE_LIMITER = TokenBucket()
@@ -0,0 +1,305 @@
+"""Data service sharing toplogger analysis tables across app processes.
+
+One service process owns the tables (memoized, snapshotted and backed by
+the shared response cache); Streamlit replicas query it and get frames as
+Arrow IPC streams. Concurrent identical queries are computed once.
+
+    python -m toplogger.service --port 8765 --warm
+    TOPLOGGER_SERVICE_URL=http://127.0.0.1:8765 streamlit run User.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pyarrow as pa
+import requests
+
+from .exceptions import TopLoggerError, TopLoggerHTTPError
+from .singleflight import SingleFlight
+from .utils import is_fresh
+
+logger = logging.getLogger(__name__)
+
+SERVICE_URL = os.environ.get("TOPLOGGER_SERVICE_URL")
+# How long app processes reuse tables of the service before querying again.
+SERVICE_CACHE_TTL = timedelta(
+    seconds=float(os.environ.get("TOPLOGGER_SERVICE_CACHE_TTL", 60))
+)
+# Encoded answers the service keeps in memory, and for how long.
+MEMO_MAX_ENTRIES = 256
+MEMO_MAX_AGE = timedelta(minutes=5)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CONTENT_TYPE = "application/vnd.toplogger.frames"
+
+Frames = Dict[str, pd.DataFrame]
+_LENGTH = struct.Struct("<Q")
+
+
+def encode_frames(frames: Frames, data: Any = None) -> bytes:
+    """Serialize frames as Arrow IPC streams, preceded by a JSON header.
+
+    Every part is prefixed by its length; the header lists frame names and
+    carries ``data``, any JSON-serializable extras.
+    """
+    header = json.dumps({"frames": list(frames), "data": data}).encode()
+    parts = [header]
+    for df in frames.values():
+        table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        parts.append(sink.getvalue().to_pybytes())
+    return b"".join(_LENGTH.pack(len(part)) + part for part in parts)
+
+
+def decode_frames(body: bytes) -> Tuple[Frames, Any]:
+    """Inverse of encode_frames, frames are read without copying the body."""
+    buffer = pa.py_buffer(body)
+    parts, offset = [], 0
+    while offset < len(body):
+        (length,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        parts.append(buffer.slice(offset, length))
+        offset += length
+    header = json.loads(parts[0].to_pybytes())
+    frames = {
+        name: pa.ipc.open_stream(part).read_all().to_pandas()
+        for name, part in zip(header["frames"], parts[1:])
+    }
+    return frames, header["data"]
+
+
+def _user_master_tables(user_id: int, refresh: bool) -> Tuple[Frames, Any]:
+    from .analysis import load_user_master_tables
+
+    (
+        df_ascends,
+        gyms,
+        df_community_grades,
+        df_community_opinions,
+        df_toppers,
+    ) = load_user_master_tables(user_id, refresh=refresh)
+    frames = {
+        "ascends": df_ascends,
+        "community_grades": df_community_grades,
+        "community_opinions": df_community_opinions,
+        "toppers": df_toppers,
+    }
+    return frames, {"gyms": gyms}
+
+
+def _gym_climbs(gym_id: int, refresh: bool) -> Tuple[Frames, Any]:
+    from .analysis import load_gym_climbs
+
+    return {"climbs": load_gym_climbs(gym_id, refresh=refresh)}, None
+
+
+def _gym_aggregates(gym_id: int, refresh: bool) -> Tuple[Frames, Any]:
+    from .aggregates import get_gym_aggregates
+
+    return get_gym_aggregates(gym_id, refresh=refresh), None
+
+
+ROUTES: Dict[str, Callable[[int, bool], Tuple[Frames, Any]]] = {
+    "users/{}/master_tables": _user_master_tables,
+    "gyms/{}/climbs": _gym_climbs,
+    "gyms/{}/aggregates": _gym_aggregates,
+}
+RE_ROUTE = re.compile(r"^/(users|gyms)/(\d+)/(\w+)$")
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Serve ROUTES as encoded frames; identical queries share one call."""
+
+    server: "DataService"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        match = RE_ROUTE.match(url.path)
+        route = match and ROUTES.get(f"{match[1]}/{{}}/{match[3]}")
+        if route is None:
+            self._reply(404, json.dumps({"error": "not found"}).encode())
+            return
+        refresh = parse_qs(url.query).get("refresh", ["0"])[0] == "1"
+        try:
+            body = self.server.answer(
+                url.path, refresh, lambda: encode_frames(*route(int(match[2]), refresh))
+            )
+        except TopLoggerError as e:
+            logger.warning("Query %s failed: %s", self.path, e)
+            status = getattr(e, "status_code", 502)
+            self._reply(status, json.dumps({"error": str(e)}).encode())
+            return
+        except Exception as e:
+            logger.exception("Query %s failed", self.path)
+            error = f"{type(e).__name__}: {e}"
+            self._reply(500, json.dumps({"error": error}).encode())
+            return
+        self._reply(200, body, CONTENT_TYPE)
+
+    def _reply(
+        self, status: int, body: bytes, content_type: str = "application/json"
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
+
+
+class DataService(ThreadingHTTPServer):
+    """Serve analysis tables, keeping recent answers in memory.
+
+    Answers are memoized per path for MEMO_MAX_AGE, up to MEMO_MAX_ENTRIES
+    of them, so repeated queries skip reading and encoding the snapshots.
+    Refreshing queries are always computed and replace the memoized answer.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        super().__init__((host, port), ServiceHandler)
+        self.flight = SingleFlight()
+        self.memo: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.memo_lock = threading.Lock()
+
+    def answer(self, path: str, refresh: bool, compute: Callable[[], bytes]) -> bytes:
+        """Memoized answer to path, computed once for concurrent queries."""
+        with self.memo_lock:
+            if not refresh and is_fresh(self.memo, path, MEMO_MAX_AGE):
+                self.memo.move_to_end(path)
+                return self.memo[path][1]
+        body = self.flight.do((path, refresh), compute)
+        with self.memo_lock:
+            self.memo.pop(path, None)
+            self.memo[path] = (time.time(), body)
+            while len(self.memo) > MEMO_MAX_ENTRIES:
+                self.memo.popitem(last=False)
+        return body
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class ServiceClient:
+    """Query a DataService; the methods mirror the local analysis loaders."""
+
+    def __init__(self, url: Optional[str] = SERVICE_URL, timeout: float = 600):
+        if not url:
+            raise ValueError("No data service URL, set TOPLOGGER_SERVICE_URL")
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.flight = SingleFlight()
+
+    def query(self, path: str, refresh: bool = False) -> Tuple[Frames, Any]:
+        """Get frames and extras of path; concurrent identical queries share one."""
+        return self.flight.do((path, refresh), self._query, path, refresh)
+
+    def _query(self, path: str, refresh: bool) -> Tuple[Frames, Any]:
+        url = f"{self.url}/{path}"
+        try:
+            res = self.session.get(
+                url, params={"refresh": int(refresh)}, timeout=self.timeout
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise TopLoggerError(f"{url}: {e}", url) from e
+        if res.status_code != 200:
+            raise TopLoggerHTTPError(res.status_code, url, res.text)
+        return decode_frames(res.content)
+
+    def user_master_tables(self, user_id: int, refresh: bool = False):
+        """Same as analysis.load_user_master_tables."""
+        frames, data = self.query(f"users/{user_id}/master_tables", refresh)
+        # JSON turned the integer keys of gyms, holds and setters to strings.
+        gyms = {
+            int(gym_id): {
+                **gym,
+                "holds": {int(k): v for k, v in gym["holds"].items()},
+                "setters": {int(k): v for k, v in gym["setters"].items()},
+            }
+            for gym_id, gym in data["gyms"].items()
+        }
+        return (
+            frames["ascends"],
+            gyms,
+            frames["community_grades"],
+            frames["community_opinions"],
+            frames["toppers"],
+        )
+
+    def gym_climbs(self, gym_id: int, refresh: bool = False) -> pd.DataFrame:
+        """Same as analysis.load_gym_climbs."""
+        return self.query(f"gyms/{gym_id}/climbs", refresh)[0]["climbs"]
+
+    def gym_aggregates(self, gym_id: int, refresh: bool = False) -> Frames:
+        """Same as aggregates.get_gym_aggregates."""
+        return self.query(f"gyms/{gym_id}/aggregates", refresh)[0]
+
+
+_client = None
+
+
+def get_client() -> Optional[ServiceClient]:
+    """Client of the data service at SERVICE_URL, None if it is not set."""
+    global _client
+    if _client is None and SERVICE_URL:
+        _client = ServiceClient(SERVICE_URL)
+    return _client
+
+
+def cache_loader(cache: Callable) -> Callable:
+    """Decorator caching page loaders with cache, e.g. st.cache_data.
+
+    With SERVICE_URL set the tables are owned by the data service, so app
+    processes keep their copy for SERVICE_CACHE_TTL only; reruns within it
+    (e.g. picking another session) neither query nor decode them again.
+    """
+    if not SERVICE_URL:
+        return cache
+    return cache(ttl=SERVICE_CACHE_TTL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--warm", action="store_true", help="also keep the gym caches warm"
+    )
+    parser.add_argument("--interval", type=float, default=600, help="seconds")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.warm:
+        from .warmer import CacheWarmer
+
+        CacheWarmer(interval=timedelta(seconds=args.interval)).start()
+    with DataService(args.host, args.port) as service:
+        logger.info("Serving toplogger tables on %s", service.url)
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
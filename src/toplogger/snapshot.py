@@ -0,0 +1,79 @@
+import os
+import shutil
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from .sync import STORE_DIR
+
+KEEP_SNAPSHOTS = 2
+
+
+def _snapshots_dir(kind: str, key: Union[int, str]) -> Path:
+    return STORE_DIR / "snapshots" / kind / str(key)
+
+
+def _list_snapshots(kind: str, key: Union[int, str]) -> list[Path]:
+    """List finished snapshots of key, oldest first."""
+    root = _snapshots_dir(kind, key)
+    if not root.exists():
+        return []
+    return sorted(
+        (path for path in root.iterdir() if path.name.isdigit()),
+        key=lambda path: int(path.name),
+    )
+
+
+def save_snapshot(
+    kind: str, key: Union[int, str], frames: dict[str, pd.DataFrame]
+) -> Path:
+    """Write frames as uncompressed Feather files into a new snapshot.
+
+    Every column is written as one chunk so load_snapshot can read it
+    without copying. Snapshots are directories named by fetch time in
+    nanoseconds; only the newest ``KEEP_SNAPSHOTS`` are kept.
+    """
+    path = _snapshots_dir(kind, key) / str(time.time_ns())
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.mkdir(parents=True)
+    for name, df in frames.items():
+        feather.write_feather(
+            df.reset_index(drop=True),
+            tmp / f"{name}.feather",
+            compression="uncompressed",
+            chunksize=max(len(df), 1),
+        )
+    os.replace(tmp, path)
+    for old in _list_snapshots(kind, key)[:-KEEP_SNAPSHOTS]:
+        shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def load_snapshot(
+    kind: str, key: Union[int, str], max_age: Optional[timedelta] = None
+) -> Optional[dict[str, pd.DataFrame]]:
+    """Read frames of the newest snapshot, memory-mapped.
+
+    Numeric and boolean columns without missing values are read-only views
+    of the mapped files, other columns (strings, nullable, categorical) are
+    converted into pandas memory. Returns None if there is no snapshot or
+    the newest is older than max_age.
+    """
+    snapshots = _list_snapshots(kind, key)
+    if not snapshots:
+        return None
+    latest = snapshots[-1]
+    age = time.time() - int(latest.name) / 1e9
+    if max_age is not None and age > max_age.total_seconds():
+        return None
+    return {
+        # One block per column, consolidating blocks would copy them.
+        path.stem: feather.read_table(path, memory_map=True).to_pandas(
+            split_blocks=True
+        )
+        for path in latest.glob("*.feather")
+    }
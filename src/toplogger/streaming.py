@@ -0,0 +1,97 @@
+import codecs
+import json
+from itertools import islice
+from typing import Any, Iterable, Iterator, List
+
+import requests
+
+from . import codec
+
+READ_SIZE = 64 * 1024
+# Bodies from this size on are decoded incrementally, keeping peak memory
+# bounded; smaller ones decode faster at once.
+STREAM_MIN_BYTES = 1024 * 1024
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Incrementally decode the items of a top-level JSON array.
+
+    Only the not yet decoded tail of the document is kept in memory.
+    """
+    text = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf, pos, exhausted = "", 0, False
+
+    def more() -> bool:
+        nonlocal buf, pos, exhausted
+        if exhausted:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buf = buf[pos:] + text.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + text.decode(chunk)
+        pos = 0
+        return True
+
+    def skip(chars: str) -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or not more():
+                return
+
+    skip(_WHITESPACE)
+    if buf[pos : pos + 1] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    skip(_WHITESPACE)
+    if buf[pos : pos + 1] == "]":
+        return
+    while True:
+        skip(_WHITESPACE)
+        try:
+            item, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            end = None
+        # An item is only complete once followed by "," or "]": a number at
+        # the buffer end ("1" of "1.5") may continue in the next chunk.
+        after = end
+        while after is not None and after < len(buf) and buf[after] in _WHITESPACE:
+            after += 1
+        if after is None or after == len(buf) or buf[after] not in ",]":
+            if not more():
+                raise ValueError("Malformed or truncated JSON array")
+            continue
+        pos = after + 1
+        yield item
+        if buf[after] == "]":
+            return
+
+
+def iter_response_records(res: requests.Response) -> Iterator[Any]:
+    """Records of a JSON array response.
+
+    Bodies smaller than STREAM_MIN_BYTES are decoded at once (with orjson
+    when installed), which is faster. Larger ones are decoded incrementally
+    whether or not orjson is installed, so the whole list of dicts never
+    has to exist at once.
+    """
+    if len(res.content) >= STREAM_MIN_BYTES:
+        yield from iter_json_array(res.iter_content(READ_SIZE))
+        return
+    records = codec.loads(res.content)
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON array")
+    yield from records
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split items into lists of up to size items."""
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, List, Union
+
+from .codec import loads
+from .toplogger import TopLogger
+
+STORE_DIR = Path(os.environ.get("TOPLOGGER_STORE", ".toplogger"))
+# Deltas never see deleted or edited older ascends, so ascends last synced
+# in full longer ago are redownloaded in full.
+FULL_SYNC_MAX_AGE = timedelta(days=1)
+
+_sync_locks: dict[str, threading.Lock] = {}
+
+
+def _ascends_path(user_id: Union[int, str]) -> Path:
+    return STORE_DIR / "ascends" / f"{user_id}.json"
+
+
+def load_user_ascends(user_id: Union[int, str]) -> List[Any]:
+    """Load stored ascends of user, empty if never synced."""
+    path = _ascends_path(user_id)
+    if not path.exists():
+        return []
+    return loads(path.read_bytes())
+
+
+def save_user_ascends(user_id: Union[int, str], ascends: List[Any]) -> None:
+    """Atomically replace stored ascends of user."""
+    path = _ascends_path(user_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A temp file per writer, processes syncing the same user do not collide.
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp", delete=False
+    ) as f:
+        json.dump(ascends, f)
+    try:
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+def _full_sync_path(user_id: Union[int, str]) -> Path:
+    # Touched after each full sync; delta syncs rewrite the ascends file.
+    return STORE_DIR / "ascends" / f"{user_id}.full"
+
+
+def _is_stale(user_id: Union[int, str], max_age: timedelta) -> bool:
+    """Whether ascends of user were last synced in full over max_age ago."""
+    try:
+        mtime = _full_sync_path(user_id).stat().st_mtime
+    except FileNotFoundError:
+        return True
+    return time.time() - mtime > max_age.total_seconds()
+
+
+def sync_user_ascends(
+    user_id: Union[int, str],
+    full: bool = False,
+    refresh: bool = False,
+    max_age: timedelta = FULL_SYNC_MAX_AGE,
+) -> List[Any]:
+    """Fetch ascends (with climbs) of user that are new since the last sync.
+
+    Only ascends logged on or after the day of the newest stored ascend are
+    requested, then merged into the stored history by id. Deltas miss ascends
+    deleted or edited in the app, so everything is redownloaded with
+    ``full=True`` or once the last full sync is older than max_age.
+    ``refresh=True`` bypasses the response cache for the delta; a full sync
+    always bypasses it.
+    """
+    with _sync_locks.setdefault(str(user_id), threading.Lock()):
+        full = full or _is_stale(user_id, max_age)
+        stored = [] if full else load_user_ascends(user_id)
+        builder = TopLogger().user_ascends(user_id).includes("climb")
+        if stored:
+            # Refetch the whole last day so differing UTC offsets cannot skip rows.
+            since = max(ascend["date_logged"] for ascend in stored)[:10]
+            builder = builder.filters({"date_logged": {"gte": since}})
+        ascends = {ascend["id"]: ascend for ascend in stored}
+        fetched = builder.execute(cached=not (refresh or full))
+        ascends.update({ascend["id"]: ascend for ascend in fetched})
+        merged = sorted(ascends.values(), key=lambda ascend: ascend["id"])
+        save_user_ascends(user_id, merged)
+        if full:
+            _full_sync_path(user_id).touch()
+        return merged
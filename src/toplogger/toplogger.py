@@ -1,24 +1,287 @@
-from typing import Any, Union
+import inspect
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import requests
-import requests_cache
 
 from .builder import RequestBuilder
+from .codec import decode_json
+from .exceptions import TopLoggerError, TopLoggerHTTPError, TopLoggerRateLimitError
+from .instrumentation import RequestEvent, emit, endpoint_of, timed_iter
+from .ratelimit import RATE_LIMITER, RateLimitedAdapter
+from .singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    import requests_cache
+
+DEFAULT_MAX_WORKERS = 8
+POOL_MAXSIZE = 32
+API_URL = os.environ.get("TOPLOGGER_API_URL", "https://api.toplogger.nu/v1")
+
+# Cache expiry per endpoint of API_URL. requests_cache uses the first
+# matching pattern, so more specific patterns go first. Expired responses
+# are revalidated with ETag / Last-Modified when the API sent them.
+URLS_EXPIRE_AFTER = {
+    f"{API_URL}/gyms/*/climbs/*/stats": timedelta(hours=1),
+    f"{API_URL}/gyms/*/climbs": timedelta(days=1),
+    f"{API_URL}/gyms": timedelta(days=7),
+    f"{API_URL}/groups": timedelta(days=1),
+    f"{API_URL}/ascends": timedelta(minutes=10),
+    f"{API_URL}/users": timedelta(hours=1),
+}
+DEFAULT_EXPIRE_AFTER = timedelta(days=1)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# Longest Retry-After waited for; asked to wait longer, the request fails.
+MAX_RETRY_AFTER = float(os.environ.get("TOPLOGGER_MAX_RETRY_AFTER", 300.0))
+
+_session = None
+_session_lock = threading.Lock()
+# Identical requests in flight, shared by all clients like the session.
+_flight = SingleFlight()
+
+
+def get_session() -> "requests_cache.CachedSession":
+    """Get the process-wide cached session shared by all clients.
+
+    The cache backend is set up by toplogger.cache, which also keeps it
+    within its limits on a background thread; of the processes sharing a
+    cache one evicts at a time (see start_evictor).
+    requests_cache and the backend are imported on first use so importing
+    the client stays cheap.
+    """
+    global _session
+    import requests_cache
+
+    from .cache import make_backend, start_evictor
+
+    with _session_lock:
+        if _session is None:
+            _session = requests_cache.CachedSession(
+                backend=make_backend(),
+                expire_after=DEFAULT_EXPIRE_AFTER,
+                urls_expire_after=URLS_EXPIRE_AFTER,
+            )
+            adapter = RateLimitedAdapter(RATE_LIMITER, pool_maxsize=POOL_MAXSIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            start_evictor(_session.cache)
+        return _session
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    """Seconds from a Retry-After header, given as seconds or HTTP date."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return (when - datetime.now(timezone.utc)).total_seconds()
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number ``attempt`` (0-based).
+
+    Exactly Retry-After when given, otherwise exponential backoff with full
+    jitter.
+    """
+    delay = _parse_retry_after(retry_after) if retry_after else None
+    if delay is None:
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+    return max(delay, 0.0)
+
+
+def cache_status(res: requests.Response) -> str:
+    """Whether response was a cache "hit", "revalidate" (304) or "miss"."""
+    if getattr(res, "revalidated", False):
+        return "revalidate"
+    return "hit" if getattr(res, "from_cache", False) else "miss"
 
 
 class TopLogger:
-    def __init__(self):
-        self.base_url = "https://api.toplogger.nu/v1"
-        self.session = requests_cache.CachedSession()
-
-    def send(self, request: requests.PreparedRequest, cached: bool) -> Any:
-        if not cached:
-            res = self.session.send(request, force_refresh=True)
-        else:
-            res = self.session.send(request)
-        if res.status_code != 200:
-            raise Exception(f"[{res.status_code}]: {res.text}")
-        return res.json()
+    def __init__(self, session: Optional["requests_cache.CachedSession"] = None):
+        self.base_url = API_URL
+        self.session = get_session() if session is None else session
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        cached: bool,
+        decode: Optional[Callable[[requests.Response], Any]] = None,
+    ) -> Any:
+        """Send request, retrying rate limited, 5xx and connection failures.
+
+        Retries wait for Retry-After when the API sends it and a 429 pauses
+        all requests of the process; longer waits than MAX_RETRY_AFTER fail.
+        The response is decoded with ``decode``, as JSON by default (with
+        orjson when installed). Decoders run once per fetch, timed in its
+        RequestEvent, and concurrent identical requests wait on one fetch and
+        share the decoded result. Generator decoders (iter_response_records)
+        decode lazily per caller over the shared response; the time spent
+        decoding is emitted as a "decode <endpoint>" span once consumed.
+        """
+        lazy = decode is not None and inspect.isgeneratorfunction(decode)
+        eager = None if lazy else decode_json if decode is None else decode
+        key = (
+            id(self.session),
+            request.method,
+            request.url,
+            request.body,
+            cached,
+            eager,
+        )
+        fetched = []
+
+        def fetch():
+            fetched.append(True)
+            return self._fetch(request, cached, eager)
+
+        start = time.perf_counter()
+        res, data = _flight.do(key, fetch)
+        if not fetched:
+            emit(
+                RequestEvent(
+                    endpoint=endpoint_of(request.url),
+                    url=request.url,
+                    status_code=res.status_code,
+                    latency=time.perf_counter() - start,
+                    decode_time=0.0,
+                    bytes=len(res.content),
+                    cache="coalesced",
+                )
+            )
+            self._count("coalesced")
+        if lazy:
+            return timed_iter(decode(res), f"decode {endpoint_of(request.url)}")
+        return data
+
+    def _fetch(
+        self,
+        request: requests.PreparedRequest,
+        cached: bool,
+        decode: Optional[Callable[[requests.Response], Any]],
+    ) -> Tuple[requests.Response, Any]:
+        """Get the 200 response of request, and its decoded body if decode."""
+        for attempt in range(MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                if not cached:
+                    res = self.session.send(request, **self._refresh_kwargs(request))
+                else:
+                    res = self.session.send(request)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == MAX_RETRIES:
+                    raise TopLoggerError(f"{request.url}: {e}", request.url) from e
+                time.sleep(retry_delay(attempt))
+                continue
+            latency = time.perf_counter() - start
+            data, decode_time = None, 0.0
+            if res.status_code == 200 and decode is not None:
+                start = time.perf_counter()
+                data = decode(res)
+                decode_time = time.perf_counter() - start
+            emit(
+                RequestEvent(
+                    endpoint=endpoint_of(request.url),
+                    url=request.url,
+                    status_code=res.status_code,
+                    latency=latency,
+                    decode_time=decode_time,
+                    bytes=len(res.content),
+                    cache=cache_status(res),
+                )
+            )
+            self._count(cache_status(res))
+            if res.status_code == 200:
+                return res, data
+            delay = retry_delay(attempt, res.headers.get("Retry-After"))
+            if (
+                res.status_code not in RETRY_STATUSES
+                or attempt == MAX_RETRIES
+                or delay > MAX_RETRY_AFTER
+            ):
+                if res.status_code == 429:
+                    raise TopLoggerRateLimitError(
+                        res.status_code, request.url, res.text
+                    )
+                raise TopLoggerHTTPError(res.status_code, request.url, res.text)
+            if res.status_code == 429:
+                # Every worker of the process waits, not just this request.
+                RATE_LIMITER.pause(delay)
+            time.sleep(delay)
+
+    def _count(self, status: str) -> None:
+        """Count a response of cache status for toplogger.cache.cache_stats."""
+        cache = getattr(self.session, "cache", None)
+        if cache is not None:
+            from .cache import count
+
+            count(cache, status)
+
+    def _refresh_kwargs(self, request: requests.PreparedRequest) -> dict:
+        """Send kwargs bypassing the cached response of request.
+
+        Revalidates (a 304 if unchanged) when the cached response has an ETag
+        or Last-Modified; without validators requests_cache would return the
+        cached response as is, so it is refetched instead.
+        """
+        cache = self.session.cache
+        cached_response = cache.get_response(cache.create_key(request))
+        headers = {} if cached_response is None else cached_response.headers
+        if "ETag" in headers or "Last-Modified" in headers:
+            return {"refresh": True}
+        return {"force_refresh": True}
+
+    def execute_all(
+        self,
+        builders: Iterable[RequestBuilder],
+        cached: bool = True,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        model: Any = None,
+    ) -> List[Any]:
+        """Execute builders concurrently, returning results in input order.
+
+        The first failing request (in input order) re-raises its exception,
+        same as executing the builders one after another; requests not started
+        yet are cancelled then. ``model`` is passed on to
+        RequestBuilder.execute.
+        """
+        builders = list(builders)
+        if max_workers <= 1 or len(builders) <= 1:
+            return [builder.execute(cached=cached, model=model) for builder in builders]
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            results = list(
+                pool.map(lambda b: b.execute(cached=cached, model=model), builders)
+            )
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+        return results
 
     def gyms(self):
         return RequestBuilder(self).set_url(f"{self.base_url}/gyms")
@@ -50,3 +313,40 @@ class TopLogger:
             .set_url(f"{self.base_url}/groups")
             .filters({"gym_id": gym_id, "live": True})
         )
+
+
+class AsyncTopLogger(TopLogger):
+    """TopLogger client whose builders are executed with ``await``.
+
+    Requests run on worker threads over the shared cached session, so they
+    reuse its connection pool and cache backend. asyncio is imported on first
+    use, callers awaiting these already have it loaded.
+    """
+
+    async def send(
+        self,
+        request: requests.PreparedRequest,
+        cached: bool,
+        decode: Optional[Callable[[requests.Response], Any]] = None,
+    ) -> Any:
+        import asyncio
+
+        return await asyncio.to_thread(super().send, request, cached, decode)
+
+    async def execute_all(
+        self,
+        builders: Iterable[RequestBuilder],
+        cached: bool = True,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        model: Any = None,
+    ) -> List[Any]:
+        """Execute builders concurrently, returning results in input order."""
+        import asyncio
+
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def execute(builder):
+            async with semaphore:
+                return await builder.execute(cached=cached, model=model)
+
+        return list(await asyncio.gather(*(execute(b) for b in builders)))
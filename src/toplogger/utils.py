@@ -1,6 +1,7 @@
-from typing import Any, List
-
-import pandas as pd
+import threading
+import time
+from datetime import timedelta
+from typing import Any, List, Tuple
 
 from .toplogger import TopLogger
 
@@ -67,22 +68,97 @@ NUM2FRENCHGRADE = {
 }
 
 
+# Memoized gym data is reread from the response cache once older than this,
+# picking up responses refreshed meanwhile (e.g. by the cache warmer).
+GYM_METADATA_MAX_AGE = timedelta(minutes=10)
+
+_gym_metadata: dict[int, Tuple[float, dict[str, Any]]] = {}
+_gym_metadata_locks: dict[int, threading.Lock] = {}
+_gym_groups: dict[int, Tuple[float, List[Any]]] = {}
+_gym_groups_locks: dict[int, threading.Lock] = {}
+
+
+def is_fresh(memo: dict, key: Any, max_age: timedelta) -> bool:
+    """Whether memo has an entry (time stored, value) for key within max_age."""
+    entry = memo.get(key)
+    return entry is not None and entry[0] > time.time() - max_age.total_seconds()
+
+
 def find_gyms_by_name(name: str) -> List[Any]:
     """Find gym ids by name."""
-    gyms = TopLogger().gyms().execute()
-    return [gym for gym in gyms if name.lower() in gym["name"].lower()]
+    return [
+        gym
+        for chunk in TopLogger().gyms().iter_records()
+        for gym in chunk
+        if name.lower() in gym["name"].lower()
+    ]
+
+
+def get_gym_metadata(
+    gym_id: int, refresh: bool = False, max_age: timedelta = GYM_METADATA_MAX_AGE
+) -> dict[str, Any]:
+    """Get gym with its holds and setters keyed by id.
 
+    Fetched in one request and memoized per process for max_age; pass
+    ``refresh=True`` to refetch. The returned dict is shared, do not mutate
+    it.
+    """
+    gym_id = int(gym_id)
+    with _gym_metadata_locks.setdefault(gym_id, threading.Lock()):
+        if refresh or not is_fresh(_gym_metadata, gym_id, max_age):
+            gym = (
+                TopLogger()
+                .gym(gym_id)
+                .includes("holds")
+                .includes("setters")
+                .execute(cached=not refresh)
+            )
+            _gym_metadata[gym_id] = (
+                time.time(),
+                {
+                    **gym,
+                    "holds": list2dict(gym["holds"], "id"),
+                    "setters": list2dict(gym["setters"], "id"),
+                },
+            )
+        return _gym_metadata[gym_id][1]
 
-def get_gym_holds_dict(gym_id: int) -> List[dict[int, Any]]:
+
+def get_gym_groups(
+    gym_id: int, refresh: bool = False, max_age: timedelta = GYM_METADATA_MAX_AGE
+) -> List[Any]:
+    """Get live groups (circuits) of gym with their climbs.
+
+    Memoized per process for max_age, separately from gym metadata and
+    climbs.
+    """
+    gym_id = int(gym_id)
+    with _gym_groups_locks.setdefault(gym_id, threading.Lock()):
+        if refresh or not is_fresh(_gym_groups, gym_id, max_age):
+            groups = (
+                TopLogger()
+                .groups(gym_id)
+                .includes("climb_groups")
+                .execute(cached=not refresh)
+            )
+            _gym_groups[gym_id] = (time.time(), groups)
+        return _gym_groups[gym_id][1]
+
+
+def clear_gym_metadata() -> None:
+    """Drop all memoized gym metadata and groups."""
+    _gym_metadata.clear()
+    _gym_groups.clear()
+
+
+def get_gym_holds_dict(gym_id: int) -> dict[int, Any]:
     """Get holds for gym."""
-    holds = TopLogger().gym(gym_id).includes("holds").execute()["holds"]
-    return {hold["id"]: hold for hold in holds}
+    return get_gym_metadata(gym_id)["holds"]
 
 
-def get_gym_setters_dict(gym_id: int) -> List[dict[int, Any]]:
+def get_gym_setters_dict(gym_id: int) -> dict[int, Any]:
     """Get setters for gym."""
-    setters = TopLogger().gym(gym_id).includes("setters").execute()["setters"]
-    return {setter["id"]: setter for setter in setters}
+    return get_gym_metadata(gym_id)["setters"]
 
 
 def list2dict(lst: List[Any], col="id") -> dict[Any, Any]:
@@ -91,6 +167,8 @@ def list2dict(lst: List[Any], col="id") -> dict[Any, Any]:
 
 
 def json_normalize(df, col):
+    import pandas as pd
+
     return df.assign(**pd.json_normalize(df[col]).add_prefix(f"{col}_")).drop(
         columns=[col]
     )
@@ -0,0 +1,135 @@
+import argparse
+import logging
+import threading
+from datetime import timedelta
+from typing import Iterable, List
+
+from .builder import RequestBuilder
+from .toplogger import DEFAULT_MAX_WORKERS, TopLogger
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GYM_IDS = (206, 207)
+DEFAULT_INTERVAL = timedelta(minutes=10)
+DEFAULT_MARGIN = timedelta(minutes=15)
+
+
+def expires_soon(tl: TopLogger, builder: RequestBuilder, margin: timedelta) -> bool:
+    """Whether builder's response is not cached or expires within margin."""
+    cache = tl.session.cache
+    cached_response = cache.get_response(cache.create_key(builder.build()))
+    if cached_response is None:
+        return True
+    expires_in = cached_response.expires_delta
+    return expires_in is not None and expires_in <= margin.total_seconds()
+
+
+def _refresh(
+    tl: TopLogger, builders: List[RequestBuilder], margin: timedelta, max_workers: int
+) -> int:
+    stale = [builder for builder in builders if expires_soon(tl, builder, margin)]
+    tl.execute_all(stale, cached=False, max_workers=max_workers)
+    return len(stale)
+
+
+def warm_gyms(
+    gym_ids: Iterable[int] = DEFAULT_GYM_IDS,
+    margin: timedelta = DEFAULT_MARGIN,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> int:
+    """Refresh cached gym, holds, setters, groups, climbs and climb stats.
+
+    Only responses missing from the cache or expiring within margin are
+    refetched; requests are bounded by the client rate limiter. The shared
+    gym climb stats table and the Gyms page aggregates are rebuilt when any
+    of its climbs were refreshed.
+    Returns the number of refreshed responses.
+    """
+    tl = TopLogger()
+    refreshed = 0
+    for gym_id in gym_ids:
+        refreshed += _refresh(
+            tl,
+            [
+                tl.gym(gym_id).includes("holds").includes("setters"),
+                tl.groups(gym_id).includes("climb_groups"),
+                tl.climbs(gym_id),
+            ],
+            margin,
+            max_workers,
+        )
+        climbs = tl.climbs(gym_id).execute()
+        refreshed_stats = _refresh(
+            tl,
+            [tl.climb_stats(gym_id, climb["id"]) for climb in climbs if climb["lived"]],
+            margin,
+            max_workers,
+        )
+        if refreshed_stats:
+            from .aggregates import get_gym_aggregates
+
+            # Rebuilds the shared gym climb stats table too, from the
+            # responses just refreshed.
+            get_gym_aggregates(gym_id, max_age=timedelta(0))
+        refreshed += refreshed_stats
+    return refreshed
+
+
+class CacheWarmer(threading.Thread):
+    """Daemon thread running warm_gyms every interval until stopped."""
+
+    def __init__(
+        self,
+        gym_ids: Iterable[int] = DEFAULT_GYM_IDS,
+        interval: timedelta = DEFAULT_INTERVAL,
+        margin: timedelta = DEFAULT_MARGIN,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        super().__init__(name="toplogger-cache-warmer", daemon=True)
+        self.gym_ids = list(gym_ids)
+        self.interval = interval
+        self.margin = margin
+        self.max_workers = max_workers
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                refreshed = warm_gyms(self.gym_ids, self.margin, self.max_workers)
+                logger.info("Refreshed %d cached responses", refreshed)
+            except Exception:
+                logger.exception("Cache warming failed")
+            self.stopped.wait(self.interval.total_seconds())
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Keep the TopLogger response cache of gyms warm."
+    )
+    parser.add_argument("gym_ids", type=int, nargs="*", default=DEFAULT_GYM_IDS)
+    parser.add_argument("--interval", type=float, default=600, help="seconds")
+    parser.add_argument("--margin", type=float, default=900, help="seconds")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--once", action="store_true", help="warm once and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    margin = timedelta(seconds=args.margin)
+    if args.once:
+        print(warm_gyms(args.gym_ids, margin, args.max_workers))
+        return
+    warmer = CacheWarmer(
+        args.gym_ids, timedelta(seconds=args.interval), margin, args.max_workers
+    )
+    warmer.start()
+    try:
+        warmer.join()
+    except KeyboardInterrupt:
+        warmer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from toplogger.cache import CACHE_BACKEND
+
+
+class StubSession:
+    """Session answering with (status, headers) in turn, recording requests.
+
+    Answers with 200 once they run out; bodies are a JSON array.
+    """
+
+    def __init__(self, *responses, body=b"[]", delay=0.0):
+        self.responses = list(responses)
+        self.body = body
+        self.delay = delay
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        if self.delay:
+            time.sleep(self.delay)
+        status_code, headers = self.responses.pop(0) if self.responses else (200, {})
+        res = requests.Response()
+        res.status_code = status_code
+        res.headers.update(headers)
+        res._content = self.body
+        res._content_consumed = True
+        res.url = request.url
+        return res
+
+
+@pytest.fixture(name="StubSession")
+def stub_session():
+    return StubSession
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    """Fixture server of benchmarks/fixtures.py standing in for the API.
+
+    The client uses a fresh in-memory cache without rate limit, memos are
+    cleared and the store lives in tmp_path.
+    """
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+    from fixtures import Fixtures, FixtureServer
+
+    from toplogger import toplogger
+    from toplogger.aggregates import clear_gym_aggregates
+    from toplogger.analysis import clear_gym_circuits, clear_gym_climb_stats
+    from toplogger.cache import configure_cache
+    from toplogger.utils import clear_gym_metadata
+
+    def reset():
+        configure_cache(backend="memory")
+        clear_gym_metadata()
+        clear_gym_circuits()
+        clear_gym_climb_stats()
+        clear_gym_aggregates()
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(toplogger.RATE_LIMITER, "rate", 1e6)
+    reset()
+    with FixtureServer(Fixtures(climbs_per_gym=100)) as server:
+        monkeypatch.setattr(toplogger, "API_URL", server.url)
+        yield server
+    reset()
+    configure_cache(backend=CACHE_BACKEND)
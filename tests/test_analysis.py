@@ -0,0 +1,29 @@
+from toplogger.aggregates import get_gym_aggregates
+from toplogger.analysis import ASCEND_DTYPES, get_gym_climbs, get_users_master_tables
+
+
+def test_users_without_ascends(api):
+    # A user's id is their number of ascends in the fixtures.
+    df_ascends, gyms, *stats, _ = get_users_master_tables([50, 0])
+    assert set(df_ascends.user_id) == {50}
+    assert len(df_ascends) > 0
+
+    df_ascends, gyms, *stats, _ = get_users_master_tables([0])
+    assert df_ascends.empty
+    assert set(ASCEND_DTYPES) <= set(df_ascends.columns)
+    assert df_ascends.climb_grade.dtype == float
+    assert gyms == {}
+    assert all(df.empty for df in stats)
+
+
+def test_climbs_without_setter_are_not_a_setter(api):
+    df_climbs = get_gym_climbs(206)
+    no_setter = df_climbs.setter_id.isna()
+    assert no_setter.any()
+    assert df_climbs.setter[no_setter].isna().all()
+    assert (df_climbs.setter[~no_setter] != "").all()
+
+    aggregates = get_gym_aggregates(206)
+    for name in ["setter_counts", "setter_opinions", "setter_grade_diff"]:
+        setters = aggregates[name].setter
+        assert setters.notna().all() and (setters != "").all()
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+from requests_cache.models import CachedResponse
+
+from toplogger.cache import CacheEvictor, LocalRedis, evict, make_backend
+
+NOW = datetime.now(timezone.utc)
+
+
+def response(url, expires, headers=None, age=timedelta(0)):
+    return CachedResponse(
+        url=url,
+        status_code=200,
+        headers=CaseInsensitiveDict(headers or {}),
+        content=b"[]",
+        created_at=NOW - age,
+        expires=expires,
+    )
+
+
+def fill(cache):
+    responses = {
+        "never": response("http://api/never", None),
+        "later": response("http://api/later", NOW + timedelta(days=2)),
+        "soon": response("http://api/soon", NOW + timedelta(hours=1)),
+        "expired": response("http://api/expired", NOW - timedelta(hours=1)),
+        "etag": response(
+            "http://api/etag", NOW - timedelta(hours=1), headers={"ETag": "x"}
+        ),
+        "old_etag": response(
+            "http://api/old_etag",
+            NOW - timedelta(hours=1),
+            headers={"ETag": "x"},
+            age=timedelta(days=30),
+        ),
+    }
+    for name, res in responses.items():
+        cache.responses[name] = res
+
+
+@pytest.fixture(params=["memory", "sqlite", "filesystem", "redis"])
+def cache(request, tmp_path):
+    return make_backend(
+        request.param, str(tmp_path / "cache"), max_size=100, connection=LocalRedis()
+    )
+
+
+def test_evicts_unusable_and_old_expired(cache):
+    fill(cache)
+    assert evict(cache, max_size=100, max_age=timedelta(days=14)) == 2
+    assert set(cache.responses.keys()) == {"never", "later", "soon", "etag"}
+
+
+def test_evicts_soonest_expiring_past_max_size(cache):
+    fill(cache)
+    evict(cache, max_size=2, max_age=timedelta(days=14))
+    assert set(cache.responses.keys()) == {"never", "later"}
+
+
+def test_one_evictor_owns_a_shared_cache(tmp_path):
+    lock_path = str(tmp_path / "cache.evict.lock")
+    first, second = (CacheEvictor(None, lock_path=lock_path) for _ in range(2))
+    assert first.owns_cache()
+    assert not second.owns_cache()
+    first.lock_file.close()
+    assert second.owns_cache()
+    assert CacheEvictor(None).owns_cache()
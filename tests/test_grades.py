@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from toplogger.grades import GRADE_DTYPE, GRADES, grade_index, to_grade_label
+from toplogger.utils import NUM2FRENCHGRADE
+
+
+def label(grade):
+    return to_grade_label(pd.Series([grade]))[0]
+
+
+@pytest.mark.parametrize("grade", NUM2FRENCHGRADE)
+def test_known_grades(grade):
+    assert label(float(grade)) == NUM2FRENCHGRADE[grade]
+    assert label(grade) == NUM2FRENCHGRADE[grade]
+
+
+@pytest.mark.parametrize(
+    "grade, expected",
+    [
+        (6.330000001, "6ʙ"),
+        (6.329999999, "6ʙ"),
+        (6.4, "6ʙ"),
+        (6.45, "6ʙ⁺"),
+        ("6.5000001", "6ʙ⁺"),
+    ],
+)
+def test_nearest_grade(grade, expected):
+    assert label(grade) == expected
+
+
+def test_ties_go_to_the_lower_grade():
+    assert label(6.25) == NUM2FRENCHGRADE["6.17"]
+    assert label(7.085) == NUM2FRENCHGRADE["7.0"]
+
+
+def test_out_of_scale_clamps_to_the_ends():
+    assert label(0) == label(-3.0) == NUM2FRENCHGRADE["2.0"]
+    assert label(11.5) == label(1e9) == NUM2FRENCHGRADE["10.0"]
+
+
+@pytest.mark.parametrize("grade", [np.nan, None, "", "x"])
+def test_missing_grades(grade):
+    assert grade_index([grade])[0] == -1
+    assert pd.isna(label(grade))
+
+
+def test_labels_are_ordered_categories():
+    grades = pd.Series([7.0, np.nan, 5.5, 6.17], index=[3, 1, 2, 0], name="grade")
+    labels = to_grade_label(grades)
+    assert labels.dtype == GRADE_DTYPE
+    assert labels.index.equals(grades.index)
+    assert labels.name == "grade"
+    assert labels.isna().tolist() == [False, True, False, False]
+    assert labels.sort_values().dropna().tolist() == ["5ʙ⁺", "6ᴀ⁺", "7ᴀ"]
+    assert (grade_index(GRADES) == np.arange(len(GRADES))).all()
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+import requests
+
+from toplogger import toplogger
+from toplogger.exceptions import TopLoggerRateLimitError
+from toplogger.ratelimit import TokenBucket
+from toplogger.toplogger import TopLogger, retry_delay
+
+
+def request():
+    return requests.Request("GET", "http://api/gyms").prepare()
+
+
+def test_retry_after_is_not_capped():
+    assert retry_delay(0, "120") == 120
+    assert retry_delay(0, "-1") == 0
+    assert retry_delay(9) <= toplogger.BACKOFF_MAX
+
+
+def test_pause_blocks_acquire():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.pause(0.2)
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.2
+
+
+def test_429_pauses_shared_limiter(monkeypatch, StubSession):
+    sleeps, pauses = [], []
+    monkeypatch.setattr(toplogger.time, "sleep", sleeps.append)
+    monkeypatch.setattr(toplogger.RATE_LIMITER, "pause", pauses.append)
+    session = StubSession((429, {"Retry-After": "120"}), (200, {}))
+    assert TopLogger(session).send(request(), cached=True) == []
+    assert sleeps == pauses == [120]
+    assert len(session.sent) == 2
+
+
+def test_long_retry_after_fails(monkeypatch, StubSession):
+    monkeypatch.setattr(toplogger.time, "sleep", pytest.fail)
+    session = StubSession((429, {"Retry-After": "3600"}))
+    with pytest.raises(TopLoggerRateLimitError):
+        TopLogger(session).send(request(), cached=True)
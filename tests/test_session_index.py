@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from toplogger.analysis import SessionIndex
+from toplogger.grades import to_grade_label
+
+
+def ascends(n, seed=0):
+    rng = np.random.default_rng(seed)
+    date_logged = pd.Timestamp("2024-01-01") + pd.to_timedelta(
+        rng.integers(0, 20 * 24 * 60, n), unit="min"
+    )
+    grades = pd.Series(rng.choice([4.0, 5.0, 5.5, 6.17, 6.5, 7.0], n))
+    return pd.DataFrame(
+        {
+            "id": rng.permutation(n),
+            "date_logged": date_logged,
+            "grade_string": to_grade_label(grades),
+        }
+    )
+
+
+def assert_same(index, full):
+    np.testing.assert_array_equal(index.dates, full.dates)
+    np.testing.assert_array_equal(index.starts, full.starts)
+    pd.testing.assert_frame_equal(index.grade_counts, full.grade_counts)
+    for date in full.dates:
+        pd.testing.assert_frame_equal(
+            index.session(date).reset_index(drop=True),
+            full.session(date).reset_index(drop=True),
+        )
+
+
+@pytest.mark.parametrize("order", ["date_logged", "id"])
+@pytest.mark.parametrize("parts", [2, 3, 7])
+def test_updates_match_full_build(order, parts):
+    df = ascends(200)
+    full = SessionIndex(df)
+    index = SessionIndex()
+    df = df.sort_values(order)
+    for rows in np.array_split(np.arange(len(df)), parts):
+        index.update(df.iloc[rows])
+    assert_same(index, full)
+
+
+def test_update_skips_indexed_ascends():
+    df = ascends(50)
+    index = SessionIndex(df)
+    assert index.update(df) == 0
+    assert index.update(df.assign(id=df.id + 50).iloc[:5]) == 5
+    assert index.starts[-1] == 55
+
+
+def test_session_of_unknown_date():
+    index = SessionIndex(ascends(10))
+    with pytest.raises(KeyError):
+        index.session(pd.Timestamp("2000-01-01").date())
+
+
+def test_update_replaces_edited_and_drops_deleted_ascends():
+    df = ascends(200)
+    index = SessionIndex(df)
+    edited = df.assign(
+        grade_string=df.grade_string.where(df.id % 5 != 0, df.grade_string.max()),
+        date_logged=df.date_logged.where(
+            df.id % 7 != 0, df.date_logged + pd.Timedelta(days=3)
+        ),
+    )
+    edited = edited[edited.id % 11 != 0]
+    changed = edited.ne(df.loc[edited.index]).any(axis=1)
+    assert index.update(edited, full=True) == changed.sum() + (df.id % 11 == 0).sum()
+    assert_same(index, SessionIndex(edited))
+    assert index.update(edited, full=True) == 0
+
+
+def test_update_without_full_keeps_missing_ascends():
+    df = ascends(50)
+    index = SessionIndex(df)
+    assert index.update(df.iloc[:10]) == 0
+    assert index.starts[-1] == 50
+
+
+def test_full_update_can_drop_everything():
+    df = ascends(20)
+    index = SessionIndex(df)
+    assert index.update(df.iloc[:0], full=True) == 20
+    assert len(index.dates) == 0
+    assert list(index.starts) == [0]
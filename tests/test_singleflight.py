@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from toplogger import toplogger
+from toplogger.exceptions import TopLoggerHTTPError
+from toplogger.singleflight import SingleFlight
+from toplogger.toplogger import TopLogger
+
+CALLERS = 8
+
+
+def run_together(fn, callers=CALLERS):
+    """Call fn from callers threads at once; results or exceptions in order."""
+    barrier = threading.Barrier(callers)
+
+    def call(_):
+        barrier.wait()
+        try:
+            return fn()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(callers) as pool:
+        return list(pool.map(call, range(callers)))
+
+
+def test_waiters_share_the_leaders_result():
+    flight, calls = SingleFlight(), []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+
+    results = run_together(lambda: flight.do("key", compute))
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_waiters_share_the_leaders_exception():
+    flight, calls = SingleFlight(), []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError("failed")
+
+    results = run_together(lambda: flight.do("key", fail))
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert all(result is results[0] for result in results)
+    # The failed call is forgotten, the next one runs again.
+    assert flight.in_flight() == 0
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert len(calls) == 2
+
+
+def test_distinct_keys_are_not_coalesced():
+    flight = SingleFlight()
+    results = run_together(lambda: flight.do(threading.get_ident(), time.sleep, 0.1))
+    assert results == [None] * CALLERS
+
+
+def request(url="http://api/v1/gyms/1/climbs"):
+    return requests.Request("GET", url).prepare()
+
+
+def test_send_coalesces_identical_requests(StubSession):
+    session = StubSession(body=b'[{"id": 1}]', delay=0.2)
+    tl = TopLogger(session)
+    results = run_together(lambda: tl.send(request(), cached=True))
+    assert len(session.sent) == 1
+    assert results == [[{"id": 1}]] * CALLERS
+
+
+def test_send_does_not_coalesce_different_requests(StubSession):
+    session = StubSession(delay=0.2)
+    tl = TopLogger(session)
+    urls = iter(f"http://api/v1/gyms/{i}/climbs" for i in range(CALLERS))
+    lock = threading.Lock()
+
+    def send():
+        with lock:
+            url = next(urls)
+        return tl.send(request(url), cached=True)
+
+    run_together(send)
+    assert len(session.sent) == CALLERS
+
+
+def test_send_shares_failures_and_forgets_them(StubSession):
+    session = StubSession(*[(404, {})] * 2, delay=0.2)
+    tl = TopLogger(session)
+    results = run_together(lambda: tl.send(request(), cached=True))
+    assert len(session.sent) == 1
+    assert all(isinstance(result, TopLoggerHTTPError) for result in results)
+    assert toplogger._flight.in_flight() == 0
+    with pytest.raises(TopLoggerHTTPError):
+        tl.send(request(), cached=True)
+    assert len(session.sent) == 2
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from pyarrow import feather
+
+from toplogger import snapshot
+
+
+def test_snapshot_round_trip_reads_numeric_columns_in_place(monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "STORE_DIR", tmp_path)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(200_000),
+            "grade": np.linspace(4, 8, 200_000),
+            "setter": pd.array(["a", None] * 100_000, dtype="string"),
+            "setter_id": pd.array([1, None] * 100_000, dtype="Int64"),
+        }
+    )
+    path = snapshot.save_snapshot("gyms", 206, {"climbs": df, "empty": df.iloc[:0]})
+    frames = snapshot.load_snapshot("gyms", 206)
+    pd.testing.assert_frame_equal(frames["climbs"], df, check_dtype=False)
+    assert frames["empty"].empty
+
+    table = feather.read_table(path / "climbs.feather", memory_map=True)
+    for column in ["id", "grade"]:
+        assert table.column(column).num_chunks == 1
+        values = frames["climbs"][column].to_numpy()
+        # A converted copy would be writeable, a view of the map is not.
+        assert not values.flags.writeable
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+import requests
+
+from toplogger import codec, streaming
+from toplogger.streaming import chunked, iter_json_array, iter_response_records
+
+VALID = [
+    "[]",
+    " [ ] ",
+    "[1.5, false]",
+    "[1, 2.25e3, -7, 0]",
+    '[{"a": [1, {"b": null}]}, "x,]", true]',
+    '["\\u00e1\\"", "Hangár Brno"]',
+    '\n[\n  {"id": 1, "grade": "6.17"} ,\n  {"id": 2, "grade": 6.5}\n]\n',
+]
+MALFORMED = ["[1,]", "[,1]", "[1 2]", "[1", "[1,", "[", "", "{}", "[tru]"]
+
+
+def split(document, size):
+    data = document.encode()
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("document", VALID)
+def test_valid_at_every_chunk_size(document):
+    for size in range(1, len(document.encode()) + 1):
+        assert list(iter_json_array(split(document, size))) == json.loads(document)
+
+
+@pytest.mark.parametrize("document", MALFORMED)
+def test_malformed_at_every_chunk_size(document):
+    for size in range(1, max(len(document), 1) + 1):
+        with pytest.raises(ValueError):
+            list(iter_json_array(split(document, size)))
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 2)) == []
+
+
+@pytest.mark.parametrize("fast", [True, False])
+@pytest.mark.parametrize("stream_min_bytes", [0, 1 << 30])
+def test_response_records(monkeypatch, fast, stream_min_bytes):
+    if not fast:
+        monkeypatch.setattr(codec, "orjson", None)
+    monkeypatch.setattr(streaming, "STREAM_MIN_BYTES", stream_min_bytes)
+    document = VALID[4]
+    res = requests.Response()
+    res._content = document.encode()
+    res._content_consumed = True
+    assert list(iter_response_records(res)) == json.loads(document)
+    res._content = b"{}"
+    with pytest.raises(ValueError):
+        list(iter_response_records(res))
+
+
+def test_large_responses_stream_with_orjson(monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_MIN_BYTES", 16)
+    monkeypatch.setattr(codec, "loads", pytest.fail)
+    res = requests.Response()
+    res._content = VALID[4].encode()
+    res._content_consumed = True
+    assert list(iter_response_records(res)) == json.loads(VALID[4])
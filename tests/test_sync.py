@@ -0,0 +1,78 @@
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+from toplogger import sync
+
+
+class StubBuilder:
+    def __init__(self, client):
+        self.client = client
+        self.filters_ = {}
+
+    def includes(self, value):
+        return self
+
+    def filters(self, value):
+        self.filters_ = {**self.filters_, **value}
+        return self
+
+    def execute(self, cached=True):
+        self.client.requests.append(self.filters_)
+        return list(self.client.ascends)
+
+
+class StubClient:
+    def __init__(self):
+        self.ascends = []
+        self.requests = []
+
+    def user_ascends(self, user_id):
+        return StubBuilder(self)
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    client = StubClient()
+    monkeypatch.setattr(sync, "STORE_DIR", tmp_path)
+    monkeypatch.setattr(sync, "TopLogger", lambda: client)
+    return client
+
+
+def ascend(id, date):
+    return {"id": id, "date_logged": f"{date}T10:00:00.000+01:00"}
+
+
+def age(path, seconds):
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_delta_syncs_do_not_postpone_the_full_sync(client):
+    client.ascends = [ascend(1, "2024-01-01"), ascend(2, "2024-01-02")]
+    assert len(sync.sync_user_ascends(7)) == 2
+    assert client.requests[-1] == {}
+
+    # Deleted in the app; deltas only see the last day.
+    client.ascends = [ascend(2, "2024-01-02")]
+    age(sync._full_sync_path(7), 3600)
+    assert len(sync.sync_user_ascends(7)) == 2
+    assert client.requests[-1] == {"date_logged": {"gte": "2024-01-02"}}
+
+    # A day after the full sync, although the delta just rewrote the store.
+    age(sync._full_sync_path(7), 25 * 3600)
+    assert [a["id"] for a in sync.sync_user_ascends(7)] == [2]
+    assert client.requests[-1] == {}
+
+
+def test_full_sync(client):
+    client.ascends = [ascend(1, "2024-01-01")]
+    sync.sync_user_ascends(7)
+    client.ascends = []
+    assert sync.sync_user_ascends(7, max_age=timedelta(days=1)) == [
+        ascend(1, "2024-01-01")
+    ]
+    assert sync.sync_user_ascends(7, full=True) == []
+    assert sync.load_user_ascends(7) == []
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+import requests
+
+from toplogger.instrumentation import collect
+from toplogger.streaming import iter_response_records
+from toplogger.toplogger import TopLogger
+
+
+class StubBuilder:
+    def __init__(self, executed, fail=False):
+        self.executed = executed
+        self.fail = fail
+
+    def execute(self, cached=True, model=None):
+        self.executed.append(self)
+        if self.fail:
+            raise ValueError("failed")
+        time.sleep(1)
+
+
+def test_execute_all_stops_at_first_failure():
+    executed = []
+    builders = [StubBuilder(executed, fail=True)]
+    builders += [StubBuilder(executed) for _ in range(50)]
+    start = time.perf_counter()
+    with pytest.raises(ValueError):
+        TopLogger(session=object()).execute_all(builders, max_workers=4)
+    # Neither runs queued requests nor waits for the ones in flight.
+    assert time.perf_counter() - start < 0.5
+    assert len(executed) < 10
+
+
+def test_execute_all_keeps_input_order():
+    class Builder:
+        def __init__(self, i):
+            self.i = i
+
+        def execute(self, cached=True, model=None):
+            time.sleep(0.01 * (5 - self.i))
+            return self.i
+
+    results = TopLogger(session=object()).execute_all(map(Builder, range(5)))
+    assert results == list(range(5))
+
+
+def request(url="http://api/v1/gyms/1/climbs"):
+    return requests.Request("GET", url).prepare()
+
+
+def test_custom_decoder_is_timed_in_request_event(StubSession):
+    def decode(res):
+        time.sleep(0.05)
+        return res.content
+
+    with collect() as metrics:
+        TopLogger(StubSession()).send(request(), cached=True, decode=decode)
+    summary = metrics.summary()["requests"]["/v1/gyms/{id}/climbs"]
+    assert summary["decode_time"] >= 0.05
+
+
+def test_streaming_decode_is_timed_in_span(StubSession):
+    session = StubSession(body=b'[{"id": 1}, {"id": 2}]')
+    with collect() as metrics:
+        records = TopLogger(session).send(
+            request(), cached=True, decode=iter_response_records
+        )
+        assert list(records) == [{"id": 1}, {"id": 2}]
+    assert metrics.summary()["spans"]["decode /v1/gyms/{id}/climbs"]["count"] == 1